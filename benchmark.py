@@ -0,0 +1,208 @@
+# BENCHMARK
+# reproducible benchmark of the calculation and plotting pipeline, runs offline with fixed sample TLEs
+# times GenerateGeodetics, Calc_Colors, Split_and_Draw, draw_Height_Map and the image export at PLOT_DPI for a range of
+# sample and satellite counts, records the peak memory and writes everything to a json file
+#
+# example:
+#   python benchmark.py --output before.json
+#   python benchmark.py --output after.json --compare before.json
+
+# library imports
+import argparse
+import io
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")       # no display needed, has to be set before any figure is created
+import matplotlib.image
+import numpy
+import astropy
+import sgp4
+
+# import of own functions and variables
+import inputs as __INPUTS
+import functions as __FUNCTIONS
+import settings as __SETTINGS
+
+# fixed sample TLEs (ISS, NOAA 19, a sun-synchronous and a GEO satellite with fixed epochs)
+SAMPLE_TLES = [
+    ("ISS", "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005", "2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391 12345"),
+    ("NOAA 19", "1 33591U 09005A   24001.50000000  .00000100  00000-0  80000-4 0  9991", "2 33591  99.1900  60.0000 0014000 200.0000 160.0000 14.12500000 12345"),
+    ("SSO", "1 43013U 17073A   24001.50000000  .00000000  00000-0  00000-0 0  9995", "2 43013  98.7000 100.0000 0001000  90.0000 270.0000 14.19500000 12345"),
+    ("GEO", "1 41866U 16071A   24001.50000000 -.00000100  00000-0  00000-0 0  9998", "2 41866   0.0500  90.0000 0001000 180.0000 180.0000  1.00270000 12345"),
+]
+
+TIME_START = 2460311.0                  # 2024-01-01T12:00 (jd)
+TIME_INCREMENT = 10 / 86400             # 10 s
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# checksum of a TLE line (modulo 10 sum of all digits, "-" counts as 1)
+def TLE_Checksum(line):
+    return sum(int(c) if c.isdigit() else 1 if c == "-" else 0 for c in line[:68]) % 10
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# generate a reproducible constellation of satellite_count satellites from the sample TLEs
+# (every sample is repeated with shifted right ascension and mean anomaly)
+def Generate_Catalog(satellite_count):
+    list_catalog: list[(str, str, str)] = []
+    for i in range(satellite_count):
+        name, line1, line2 = SAMPLE_TLES[i % len(SAMPLE_TLES)]
+        shift = i // len(SAMPLE_TLES)
+        raan = (float(line2[17:25]) + 7.3 * shift) % 360
+        mean_anomaly = (float(line2[43:51]) + 13.7 * shift) % 360
+        line2 = line2[:17] + f"{raan:8.4f}" + line2[25:43] + f"{mean_anomaly:8.4f}" + line2[51:68]
+        line1 = line1[:68]
+        list_catalog.append((f"{name} {shift}", line1 + str(TLE_Checksum(line1)), line2 + str(TLE_Checksum(line2))))
+
+    return list_catalog
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# set the input variables for a window of sample_count points in time and satellite_count satellites
+def Setup_Inputs(sample_count, satellite_count):
+    __INPUTS.TLE_CATALOG = Generate_Catalog(satellite_count) if satellite_count > 1 else []
+    __INPUTS.TLE[0] = SAMPLE_TLES[0][1]
+    __INPUTS.TLE[1] = SAMPLE_TLES[0][2]
+    __INPUTS.TIME_START = TIME_START
+    __INPUTS.TIME_END = TIME_START + (sample_count - 0.5) * TIME_INCREMENT
+    __INPUTS.TIME_INCREMENT = TIME_INCREMENT
+    __INPUTS.ADAPTIVE_SAMPLING = False
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# measure one stage: best wall time of repeat runs and (optionally) the peak memory of one extra traced run
+# setup() prepares fresh arguments for every run (not timed), stage(*arguments) is the measured call
+def Measure(stage, setup, repeat, measure_memory):
+    list_seconds: list[float] = []
+    for _ in range(repeat):
+        arguments = setup()
+        time_start = time.perf_counter()
+        stage(*arguments)
+        list_seconds.append(time.perf_counter() - time_start)
+
+    peak_mb = None
+    if measure_memory:
+        arguments = setup()
+        tracemalloc.start()
+        stage(*arguments)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return min(list_seconds), peak_mb
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# run all stages for all sample counts (one satellite) and all satellite counts (fixed sample count)
+def Run_Benchmark(list_sample_counts, list_satellite_counts, catalog_sample_count, repeat, measure_memory):
+    img = matplotlib.image.imread(__SETTINGS.PATH_MAP)
+    list_results = []
+
+    def record(stage_name, sample_count, satellite_count, stage, setup):
+        seconds, peak_mb = Measure(stage, setup, repeat, measure_memory)
+        list_results.append({"stage": stage_name, "samples": sample_count, "satellites": satellite_count, "seconds": seconds, "peak_mb": peak_mb})
+        print(f"{stage_name:28s} samples {sample_count:>8d} satellites {satellite_count:>5d}   {seconds:10.4f} s" + (f"   {peak_mb:10.1f} MB" if peak_mb is not None else ""))
+
+    def export(p):
+        p.savefig(io.BytesIO(), format="png", dpi=__SETTINGS.PLOT_DPI)
+
+    for sample_count in list_sample_counts:
+        Setup_Inputs(sample_count, 1)
+        track = __FUNCTIONS.GenerateGeodetics(check_colors=True)
+
+        record("GenerateGeodetics", sample_count, 1, __FUNCTIONS.GenerateGeodetics, lambda: (True,))
+        record("Calc_Colors", sample_count, 1, __FUNCTIONS.Calc_Colors, lambda: (track, True))
+        record("Split_and_Draw", sample_count, 1, __FUNCTIONS.Split_and_Draw, lambda: (track.lat[0], track.lon[0], __FUNCTIONS.Create_Figure(img)[1], track.colors[0], True))
+        record("draw_Height_Map", sample_count, 1, __FUNCTIONS.draw_Height_Map, lambda: (track, track.Time_Range(), __FUNCTIONS.Create_Figure(img)[2]))
+
+        # export of a complete figure at PLOT_DPI
+        def setup_figure():
+            p, ax_Map, ax_Height = __FUNCTIONS.Create_Figure(img)
+            __FUNCTIONS.Draw_Tracks(ax_Map, ax_Height, track, track.Time_Range(), True)
+            return (p,)
+        record(f"savefig ({__SETTINGS.PLOT_DPI} dpi)", sample_count, 1, export, setup_figure)
+
+    for satellite_count in list_satellite_counts:
+        Setup_Inputs(catalog_sample_count, satellite_count)
+        record("GenerateGeodetics", catalog_sample_count, satellite_count, __FUNCTIONS.GenerateGeodetics, lambda: (True,))
+        track = __FUNCTIONS.GenerateGeodetics(check_colors=True)
+
+        def setup_tracks():
+            p, ax_Map, ax_Height = __FUNCTIONS.Create_Figure(img)
+            return ax_Map, ax_Height, track, track.Time_Range(), True
+        record("Draw_Tracks", catalog_sample_count, satellite_count, __FUNCTIONS.Draw_Tracks, setup_tracks)
+
+    return list_results
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# information about the benchmarked version and the machine
+def Get_Environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": numpy.__version__,
+        "astropy": astropy.__version__,
+        "sgp4": sgp4.__version__,
+        "matplotlib": matplotlib.__version__,
+        "transform_backend": __SETTINGS.TRANSFORM_BACKEND,
+        "plot_dpi": __SETTINGS.PLOT_DPI,
+    }
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# print the ratio of the current to an earlier result file (> 1 means slower now)
+def Compare_Results(list_results, path_old):
+    with open(path_old, "r") as old_file:
+        list_old = json.load(old_file)["results"]
+    old_seconds = {(entry["stage"], entry["samples"], entry["satellites"]): entry["seconds"] for entry in list_old}
+
+    print(f"\ncompared to {path_old} (ratio > 1: slower now)")
+    for entry in list_results:
+        key = (entry["stage"], entry["samples"], entry["satellites"])
+        if key in old_seconds and old_seconds[key] > 0:
+            print(f"{entry['stage']:28s} samples {entry['samples']:>8d} satellites {entry['satellites']:>5d}   {entry['seconds'] / old_seconds[key]:8.2f}x")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# command line interface
+def Parse_Arguments(argv=None):
+    parser = argparse.ArgumentParser(description="SAROMAN - benchmark of the calculation and plotting pipeline")
+    parser.add_argument("--samples", type=int, nargs="+", default=[10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], help="sample counts for the single satellite stages")
+    parser.add_argument("--satellites", type=int, nargs="+", default=[1, 10, 100, 1000], help="satellite counts for the catalog stages")
+    parser.add_argument("--catalog-samples", type=int, default=1000, help="sample count for the catalog stages")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest one is recorded")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure the peak memory (saves one run per measurement)")
+    parser.add_argument("--transform", choices=["astropy", "numpy"], default=__SETTINGS.TRANSFORM_BACKEND if __SETTINGS.TRANSFORM_BACKEND != "compare" else "astropy", help="TEME -> geodetic transform backend")
+    parser.add_argument("--output", default="benchmark_results.json", help="json file the results are written to")
+    parser.add_argument("--compare", help="earlier json result file to compare with")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = Parse_Arguments()
+    # always calculate, never load from the on-disk cache
+    __SETTINGS.CACHE_ENABLED = False
+    __SETTINGS.TRANSFORM_BACKEND = arguments.transform
+
+    results = Run_Benchmark(arguments.samples, arguments.satellites, arguments.catalog_samples, arguments.repeat, not arguments.no_memory)
+    with open(arguments.output, "w") as output_file:
+        json.dump({"environment": Get_Environment(), "results": results}, output_file, indent=2)
+    print(f"\nresults written to {arguments.output}")
+
+    if arguments.compare is not None:
+        Compare_Results(results, arguments.compare)
@@ -0,0 +1,222 @@
+# CACHE
+# persistent on-disk cache of propagated satellite data (lat, lon, height, TEME position and velocity)
+# every entry covers one TLE (or catalog) on one time grid (fixed time increment), the arrays are stored as .npy files
+# and loaded memory-mapped (only the requested part is copied into memory); if a requested window only extends a cached
+# one, only the missing part is propagated
+# entries are written to a directory of their own and moved into place, so several processes (e.g. the headless
+# renderer) can use the cache at the same time; any error reading or writing the cache is treated as a cache miss
+# additionally single decoded arrays (e.g. the downsampled map image) are kept as .npy files
+
+# library imports
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy
+
+# import of own functions and variables
+import settings as __SETTINGS
+import profiling as __PROFILING
+
+# cached arrays and their time axis (positions and velocities have the xyz components in the last axis)
+CACHE_FIELDS = {"position": -2, "velocity": -2, "lat": -1, "lon": -1, "height": -1}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# key of a cache entry: the TLE lines, the time increment, the transform backend and the earth orientation settings
+def Get_Key(list_tle_lines, time_increment):
+    key_string = "\n".join(list_tle_lines) + f"\n{time_increment!r}\n{__SETTINGS.TRANSFORM_BACKEND}\n{__SETTINGS.UT1_UTC!r}\n{__SETTINGS.POLAR_MOTION_X!r}\n{__SETTINGS.POLAR_MOTION_Y!r}"
+
+    return hashlib.sha1(key_string.encode()).hexdigest()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# get the data for the given points in time (equally spaced by time_increment) from the cache; missing points are
+# calculated with propagate(list_times), which has to return a dict with all CACHE_FIELDS, and added to the cache
+@__PROFILING.Stage("cache")
+def Load_or_Propagate(key, list_times, time_increment, propagate):
+    entry_path = os.path.join(__SETTINGS.CACHE_DIR, key)
+    sample_count = len(list_times)
+
+    meta = Read_Meta(entry_path)
+    if meta is not None:
+        offset = (list_times[0] - meta["anchor"]) / time_increment
+        k = int(numpy.round(offset))
+        aligned = abs(offset - k) < 1e-6
+        # the requested window overlaps or touches the cached one
+        if aligned and k <= meta["count"] and k + sample_count >= 0:
+            cached = Read_Entry(entry_path, meta)
+            # cache hit, return copies of the requested part (nothing keeps the files mapped)
+            if cached is not None and k >= 0 and k + sample_count <= meta["count"]:
+                Touch(entry_path)
+                return {name: numpy.array(Slice_Time(cached[name], axis, k, k + sample_count)) for name, axis in CACHE_FIELDS.items()}
+
+            # propagate only the missing points before and after the cached window
+            if cached is not None:
+                list_parts = []
+                if k < 0:
+                    list_parts.append(propagate(meta["anchor"] + time_increment * numpy.arange(start=k, stop=0)))
+                list_parts.append(cached)
+                if k + sample_count > meta["count"]:
+                    list_parts.append(propagate(meta["anchor"] + time_increment * numpy.arange(start=meta["count"], stop=k + sample_count)))
+                data = {name: numpy.concatenate([part[name] for part in list_parts], axis=axis) for name, axis in CACHE_FIELDS.items()}
+                anchor = meta["anchor"] + time_increment * min(k, 0)
+                del cached, list_parts
+                Write_Entry(entry_path, anchor, data)
+                start = k - min(k, 0)
+                return {name: Slice_Time(data[name], axis, start, start + sample_count) for name, axis in CACHE_FIELDS.items()}
+
+    # nothing usable cached (or a different time grid), calculate everything and replace the entry
+    data = propagate(list_times)
+    Write_Entry(entry_path, list_times[0], data)
+
+    return data
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# open the arrays of a cache entry memory-mapped; None, if they cannot be read or the entry was replaced by another
+# process meanwhile (the metadata read before and after opening the arrays differ)
+def Read_Entry(entry_path, meta):
+    try:
+        cached = {name: numpy.load(os.path.join(entry_path, name + ".npy"), mmap_mode="r") for name in CACHE_FIELDS}
+    except (OSError, ValueError):
+        return None
+    if Read_Meta(entry_path) != meta or any(numpy.shape(cached[name])[axis] != meta["count"] for name, axis in CACHE_FIELDS.items()):
+        return None
+
+    return cached
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# slice along the time axis of an array
+def Slice_Time(array, axis, start, stop):
+    index = [slice(None)] * array.ndim
+    index[axis] = slice(start, stop)
+
+    return array[tuple(index)]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# read the metadata of a cache entry (first point in time and number of points), None if there is no valid entry
+def Read_Meta(entry_path):
+    try:
+        with open(os.path.join(entry_path, "meta.json"), "r") as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# write a cache entry; the arrays are written to a new temporary directory first, so a crash never leaves a broken entry
+# and concurrent writers do not interfere (if another process moves its entry into place at the same time, this one is
+# dropped); afterwards the oldest entries are evicted, if the cache is bigger than CACHE_MAX_BYTES
+# errors are ignored, the data is only not cached then (as is data bigger than the whole cache)
+def Write_Entry(entry_path, anchor, data):
+    if sum(numpy.asarray(data[name]).nbytes for name in CACHE_FIELDS) > __SETTINGS.CACHE_MAX_BYTES:
+        return
+
+    temp_path = None
+    try:
+        os.makedirs(__SETTINGS.CACHE_DIR, exist_ok=True)
+        temp_path = tempfile.mkdtemp(dir=__SETTINGS.CACHE_DIR, prefix=os.path.basename(entry_path) + ".", suffix=".tmp")
+        for name in CACHE_FIELDS:
+            numpy.save(os.path.join(temp_path, name + ".npy"), numpy.asarray(data[name]))
+        with open(os.path.join(temp_path, "meta.json"), "w") as meta_file:
+            json.dump({"anchor": float(anchor), "count": int(numpy.shape(data["lat"])[-1])}, meta_file)
+
+        # move the old entry out of the way, then the new one into place
+        try:
+            os.replace(entry_path, temp_path + ".old.tmp")
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, entry_path)
+    except OSError:
+        pass
+    finally:
+        if temp_path is not None:
+            shutil.rmtree(temp_path + ".old.tmp", ignore_errors=True)
+            shutil.rmtree(temp_path, ignore_errors=True)
+    Evict()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# mark a cache entry as used (for the LRU eviction)
+def Touch(entry_path):
+    try:
+        os.utime(os.path.join(entry_path, "meta.json"))
+    except OSError:
+        pass
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# remove the least recently used entries, until the cache is not bigger than CACHE_MAX_BYTES
+# (temporary directories older than an hour are left over from crashed processes and removed as well)
+def Evict():
+    try:
+        list_keys = os.listdir(__SETTINGS.CACHE_DIR)
+    except OSError:
+        # no cache directory (e.g. not writable)
+        return
+
+    list_entries = []
+    for key in list_keys:
+        entry_path = os.path.join(__SETTINGS.CACHE_DIR, key)
+        meta_path = os.path.join(entry_path, "meta.json")
+        try:
+            if key.endswith(".tmp"):
+                if time.time() - os.path.getmtime(entry_path) > 3600:
+                    if os.path.isdir(entry_path):
+                        shutil.rmtree(entry_path, ignore_errors=True)
+                    else:
+                        os.remove(entry_path)
+                continue
+            if not os.path.isfile(meta_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(entry_path))
+            list_entries.append((os.path.getmtime(meta_path), size, entry_path))
+        except OSError:
+            # removed by another process meanwhile
+            continue
+
+    list_entries.sort()
+    total_size = sum(size for last_used, size, entry_path in list_entries)
+    for last_used, size, entry_path in list_entries:
+        if total_size <= __SETTINGS.CACHE_MAX_BYTES:
+            break
+        shutil.rmtree(entry_path, ignore_errors=True)
+        total_size -= size
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# key of a decoded map image: the image file (path, size and modification time) and the width it is downsampled to
+def Get_Map_Key(path, width):
+    stat = os.stat(path)
+    key_string = f"{os.path.abspath(path)}\n{stat.st_size}\n{stat.st_mtime_ns}\n{width}"
+
+    return "map_" + hashlib.sha1(key_string.encode()).hexdigest()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# load a single array from the cache; if it is not cached yet, it is calculated with decode() and added to the cache
+def Load_or_Decode(name, decode):
+    array_path = os.path.join(__SETTINGS.CACHE_DIR, name + ".npy")
+    try:
+        return numpy.load(array_path)
+    except (OSError, ValueError):
+        pass
+
+    array = decode()
+    temp_path = None
+    try:
+        os.makedirs(__SETTINGS.CACHE_DIR, exist_ok=True)
+        temp_file, temp_path = tempfile.mkstemp(dir=__SETTINGS.CACHE_DIR, prefix=name + ".", suffix=".tmp")
+        with os.fdopen(temp_file, "wb") as array_file:
+            numpy.save(array_file, array)
+        os.replace(temp_path, array_path)
+    except OSError:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return array
@@ -0,0 +1,202 @@
+# CONJUNCTIONS
+# screening of close approaches between all satellites of the loaded catalog within the calculation window
+# 1. apogee/perigee filter: two satellites, whose altitude shells do not overlap, can never come close
+# 2. all satellites are propagated together (TEME) on a coarse time grid (CONJUNCTION_SCAN_STEP); per time slice the
+#    positions are sorted into a uniform grid of cells (numpy only), only satellites in neighbouring cells are compared
+#    (the cell size covers the distance two satellites can close in half a step, so no approach is missed)
+# 3. candidate pairs are pruned by their linear closest approach within half a step of the sample
+# 4. the time of closest approach (TCA) is refined as root of the range rate (vectorized over all candidates)
+
+# library imports
+import numpy
+
+# import of own functions and variables
+import settings as __SETTINGS
+import inputs as __INPUTS
+import functions as __FUNCTIONS
+import profiling as __PROFILING
+
+EARTH_MU = 398600.4418              # km^3/s^2
+SHELL_MARGIN = 50                   # km, mean elements vs. osculating apogee/perigee and decay within the window
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# perigee and apogee radius [km] of every satellite (from the mean elements)
+def Calc_Shells(list_satrec):
+    a = numpy.array([satrec.a * satrec.radiusearthkm for satrec in list_satrec])
+    e = numpy.array([satrec.ecco for satrec in list_satrec])
+
+    return a * (1 - e), a * (1 + e)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# satellites, whose altitude shell (widened by distance) overlaps the shell of at least one other satellite
+# (sweep over the shells sorted by perigee: overlap with an earlier shell or with the next one)
+def Filter_Shells(perigee, apogee, distance):
+    order = numpy.argsort(perigee, kind="stable")
+    low = perigee[order] - distance - SHELL_MARGIN
+    high = apogee[order] + distance + SHELL_MARGIN
+
+    highest_before = numpy.concatenate([[-numpy.inf], numpy.maximum.accumulate(high)[:-1]])
+    next_low = numpy.concatenate([low[1:], [numpy.inf]])
+    overlapping = (highest_before >= low) | (next_low <= high)
+
+    return numpy.sort(order[overlapping])
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# all pairs of points closer than cell_size within the same slice, returns the indices (first, second) into the points
+# the points (N x 3) are sorted into cubic cells of cell_size per slice, every cell is compared with itself and half of its
+# 26 neighbours (the other half compares with this cell); the queries run in key order, which keeps the lookups local
+def Find_Close_Pairs(position, slice_index, cell_size):
+    cell = numpy.floor(position / cell_size).astype(numpy.int64)
+    # shift the cells to non-negative numbers, with one empty cell on every side for the neighbours
+    cell -= cell.min(axis=0) - 1
+    size = cell.max(axis=0) + 2
+    key = ((slice_index.astype(numpy.int64) * size[0] + cell[:, 0]) * size[1] + cell[:, 1]) * size[2] + cell[:, 2]
+
+    order = numpy.argsort(key, kind="stable")
+    key_sorted = key[order]
+    list_first, list_second = [], []
+    for dx, dy, dz in [(0, 0, 0)] + [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) > (0, 0, 0)]:
+        neighbour = key_sorted + (dx * size[1] + dy) * size[2] + dz
+        high = numpy.searchsorted(key_sorted, neighbour, side="right")
+        # own cell: only the points after this one
+        low = numpy.arange(1, len(key) + 1) if (dx, dy, dz) == (0, 0, 0) else numpy.searchsorted(key_sorted, neighbour, side="left")
+        count = numpy.maximum(high - low, 0)
+
+        # every point against all (remaining) points of the neighbouring cell
+        first = numpy.repeat(order, count)
+        second = order[numpy.repeat(low - numpy.cumsum(count) + count, count) + numpy.arange(count.sum())]
+        keep = numpy.sum((position[first] - position[second]) ** 2, axis=-1) <= cell_size ** 2
+        list_first.append(first[keep])
+        list_second.append(second[keep])
+
+    return numpy.concatenate(list_first), numpy.concatenate(list_second)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# relative position [km] and velocity [km/s] of pairs of satellites at individual points in time
+def Calc_Relative_States(list_satrec, first, second, times):
+    position_first, velocity_first = __FUNCTIONS.Propagate_TEME_Points(list_satrec, satellite=first, times=times)
+    position_second, velocity_second = __FUNCTIONS.Propagate_TEME_Points(list_satrec, satellite=second, times=times)
+
+    return position_second - position_first, velocity_second - velocity_first
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# screen all satellites of the catalog for close approaches (closer than CONJUNCTION_DISTANCE) within the window
+# returns a list of dicts (satellite_1, satellite_2, tca [jd], miss_distance [km], relative_speed [km/s], lat, lon [deg]
+# of the point between both satellites), sorted by the tca (cancel: see functions.Check_Cancel)
+@__PROFILING.Stage("conjunction screening")
+def Screen_Conjunctions(cancel=None):
+    list_names, list_satrec = __FUNCTIONS.Get_Satellites()
+    distance = __SETTINGS.CONJUNCTION_DISTANCE
+    perigee, apogee = Calc_Shells(list_satrec)
+    list_candidates = Filter_Shells(perigee, apogee, distance)
+    if len(list_candidates) < 2:
+        return []
+
+    # cell size: distance plus what two satellites can close within half a step (at perigee speed, with the largest
+    # gravitational acceleration as bound for the curvature)
+    half_step = __SETTINGS.CONJUNCTION_SCAN_STEP * 86400 / 2
+    perigee_min = numpy.min(perigee[list_candidates])
+    speed_max = numpy.max(numpy.sqrt(EARTH_MU * (2 / perigee[list_candidates] - 2 / (perigee[list_candidates] + apogee[list_candidates]))))
+    curvature = EARTH_MU / perigee_min ** 2 * half_step ** 2
+    cell_size = distance + 2 * speed_max * half_step + curvature
+
+    satrec_array = __FUNCTIONS.SatrecArray([list_satrec[s] for s in list_candidates])
+    list_scan_times = numpy.append(numpy.arange(start=__INPUTS.TIME_START, stop=__INPUTS.TIME_END, step=__SETTINGS.CONJUNCTION_SCAN_STEP), __INPUTS.TIME_END)
+    chunk_size = max(1, __SETTINGS.STREAM_CHUNK_SIZE // len(list_candidates))
+
+    # candidate pairs (index into list_candidates) and the sample close to their approach
+    list_first, list_second, list_sample = [], [], []
+    for start in range(0, len(list_scan_times), chunk_size):
+        __FUNCTIONS.Check_Cancel(cancel)
+        times = list_scan_times[start:start + chunk_size]
+        teme_position, teme_velocity = __FUNCTIONS.Propagate_TEME(list_times=times, satrec=satrec_array)
+        valid = numpy.all(numpy.isfinite(teme_position), axis=-1)
+
+        # all points (satellite x time) with a valid position, as one list
+        satellite, sample = numpy.nonzero(valid)
+        first, second = Find_Close_Pairs(teme_position[satellite, sample], slice_index=sample, cell_size=cell_size)
+        satellite_first, satellite_second, sample = numpy.minimum(satellite[first], satellite[second]), numpy.maximum(satellite[first], satellite[second]), sample[first]
+
+        # altitude shells of the pair overlap
+        keep = (perigee[list_candidates[satellite_first]] - distance - SHELL_MARGIN <= apogee[list_candidates[satellite_second]] + SHELL_MARGIN) & (perigee[list_candidates[satellite_second]] - distance - SHELL_MARGIN <= apogee[list_candidates[satellite_first]] + SHELL_MARGIN)
+        satellite_first, satellite_second, sample = satellite_first[keep], satellite_second[keep], sample[keep]
+
+        # linear closest approach within half a step of the sample (plus the curvature bound)
+        relative_position = teme_position[satellite_second, sample] - teme_position[satellite_first, sample]
+        relative_velocity = teme_velocity[satellite_second, sample] - teme_velocity[satellite_first, sample]
+        tau = numpy.clip(-numpy.sum(relative_position * relative_velocity, axis=-1) / numpy.maximum(numpy.sum(relative_velocity ** 2, axis=-1), 1e-12), -half_step, half_step)
+        closest = numpy.linalg.norm(relative_position + relative_velocity * tau[:, numpy.newaxis], axis=-1)
+        keep = closest <= distance + curvature
+        list_first.append(satellite_first[keep])
+        list_second.append(satellite_second[keep])
+        list_sample.append(start + sample[keep])
+
+    first = list_candidates[numpy.concatenate(list_first)]
+    second = list_candidates[numpy.concatenate(list_second)]
+    sample_times = list_scan_times[numpy.concatenate(list_sample)]
+
+    # TCA: root of the closing speed (-range rate) within half a step around the sample
+    __FUNCTIONS.Check_Cancel(cancel)
+    time_a = numpy.maximum(sample_times - half_step / 86400, list_scan_times[0])
+    time_b = numpy.minimum(sample_times + half_step / 86400, list_scan_times[-1])
+
+    def closing_speed(index, times):
+        relative_position, relative_velocity = Calc_Relative_States(list_satrec, first[index], second[index], times)
+        return -numpy.sum(relative_position * relative_velocity, axis=-1), None
+
+    tca = __FUNCTIONS.Find_Roots(closing_speed, time_a, time_b, tolerance=__SETTINGS.CONJUNCTION_TOLERANCE)
+    # an approach at the end of the interval is the closest approach of the neighbouring sample (unless the window ends)
+    inside = ((tca != time_a) | (tca == list_scan_times[0])) & ((tca != time_b) | (tca == list_scan_times[-1]))
+    first, second, tca = first[inside], second[inside], tca[inside]
+
+    relative_position, relative_velocity = Calc_Relative_States(list_satrec, first, second, tca)
+    miss_distance = numpy.linalg.norm(relative_position, axis=-1)
+    close = miss_distance <= distance
+    first, second, tca, miss_distance, relative_velocity = first[close], second[close], tca[close], miss_distance[close], relative_velocity[close]
+
+    # position of the encounter: midpoint of both satellites
+    position_first, velocity_first = __FUNCTIONS.Propagate_TEME_Points(list_satrec, satellite=first, times=tca)
+    lat, lon, height = __FUNCTIONS.TEME_to_GEODETIC_Native(list_times=tca, teme_position=position_first + relative_position[close] / 2)
+
+    list_conjunctions = []
+    for i in numpy.argsort(tca, kind="stable"):
+        list_conjunctions.append({
+            "satellite_1": list_names[first[i]],
+            "satellite_2": list_names[second[i]],
+            "tca": float(tca[i]),
+            "miss_distance": float(miss_distance[i]),
+            "relative_speed": float(numpy.linalg.norm(relative_velocity[i])),
+            "lat": float(lat[i]),
+            "lon": float(lon[i]),
+        })
+
+    return list_conjunctions
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# mark the first CONJUNCTION_LIST_LENGTH close approaches on the map, labelled with their miss distance
+def Draw_Conjunctions(ax_Map, list_conjunctions):
+    list_conjunctions = list_conjunctions[:__SETTINGS.CONJUNCTION_LIST_LENGTH]
+    if len(list_conjunctions) == 0:
+        return
+
+    ax_Map.plot([conjunction["lon"] for conjunction in list_conjunctions], [conjunction["lat"] for conjunction in list_conjunctions], linestyle="", marker="X", color="red", markersize=7)
+    for conjunction in list_conjunctions:
+        ax_Map.annotate(f"{conjunction['miss_distance']:.1f} km", xy=(conjunction["lon"], conjunction["lat"]), xytext=(4, -8), textcoords="offset points", fontsize=6, color="red")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# list of close approaches as text (at most CONJUNCTION_LIST_LENGTH)
+def Format_Conjunctions(list_conjunctions):
+    lines = [f"{'satellite 1':<16} {'satellite 2':<16} {'tca (UTC)':<19}  {'miss [km]':>9}  {'v rel [km/s]':>12}  {'lat':>6} {'lon':>7}"]
+    for conjunction in list_conjunctions[:__SETTINGS.CONJUNCTION_LIST_LENGTH]:
+        lines.append(f"{conjunction['satellite_1'][:16]:<16} {conjunction['satellite_2'][:16]:<16} {__FUNCTIONS.JD_to_ISO(conjunction['tca'])}  {conjunction['miss_distance']:9.3f}  {conjunction['relative_speed']:12.3f}  {conjunction['lat']:6.1f} {conjunction['lon']:7.1f}")
+    if len(list_conjunctions) > __SETTINGS.CONJUNCTION_LIST_LENGTH:
+        lines.append(f"... {len(list_conjunctions) - __SETTINGS.CONJUNCTION_LIST_LENGTH} more close approaches")
+
+    return "\n".join(lines)
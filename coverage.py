@@ -0,0 +1,194 @@
+# COVERAGE
+# coverage and revisit map of all satellites (catalog or single TLE) over the calculation window, on a lat/lon grid of
+# COVERAGE_RESOLUTION degrees
+# every point of the ground track sees a spherical cap (radius: half the swath COVERAGE_SWATH, at least half a cell
+# diagonal, so a track without swath marks every cell it crosses); the satellites are propagated with SGP4 on a scan grid
+# of their own (independent of TIME_INCREMENT), fine enough that the ground track moves at most 1 / COVERAGE_SCAN_DENSITY
+# cap radii between two points, so neighbouring caps overlap (and leave no gaps at the edge of the swath)
+# the caps are rasterized row by row as intervals of longitude cells and accumulated with difference arrays (one
+# bincount per block instead of one update per cell); a visit is counted where a cell enters the cap of a satellite, i.e.
+# the part of the interval not already covered by the previous point of the same satellite
+# the satellites are propagated block by block (time and satellites), so the memory stays bounded for any window
+
+# library imports
+import numpy
+
+# import of own functions and variables
+import settings as __SETTINGS
+import inputs as __INPUTS
+import functions as __FUNCTIONS
+import profiling as __PROFILING
+
+EARTH_RADIUS = 6371.0                       # km, mean radius for the cap geometry
+KM_PER_DEGREE = 2 * numpy.pi * EARTH_RADIUS / 360
+
+# sin and cos of the latitude of the row centres, per number of rows
+ROW_SIN: dict = {}
+ROW_COS: dict = {}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# cap radius [rad] seen by every point of the ground track
+def Get_Cap_Radius():
+    cell_diagonal = __SETTINGS.COVERAGE_RESOLUTION * KM_PER_DEGREE * numpy.sqrt(2)
+
+    return max(__SETTINGS.COVERAGE_SWATH, cell_diagonal) / 2 / EARTH_RADIUS
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# interval of longitude cells (first, last, unwrapped, may lie outside 0..columns-1) of the grid rows, whose centres are
+# within the cap around the points (lat, lon [rad], sin and cos of lat precalculated); rows the cap does not reach are
+# empty (first > last), rows around a pole inside the cap are full (last - first + 1 = columns)
+def Calc_Row_Intervals(lat, sin_lat, cos_lat, lon, row, cap_radius, rows, columns):
+    resolution = numpy.pi / rows
+    row_lat = (row + 0.5) * resolution - numpy.pi / 2
+    row_index = numpy.clip(row, 0, rows - 1)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        cos_half_width = (numpy.cos(cap_radius) - sin_lat * ROW_SIN[rows][row_index]) / (cos_lat * ROW_COS[rows][row_index])
+    half_width = numpy.arccos(numpy.clip(cos_half_width, -1, 1))
+
+    first = numpy.ceil((lon - half_width + numpy.pi) / resolution - 0.5).astype(numpy.int64)
+    last = numpy.floor((lon + half_width + numpy.pi) / resolution - 0.5).astype(numpy.int64)
+    reached = numpy.abs(lat - row_lat) <= cap_radius
+    last = numpy.where(reached, last, first - 1)
+    full = reached & ((cos_half_width <= -1) | (last - first + 1 >= columns))
+    last = numpy.where(full, first + columns - 1, last)
+
+    return first, last, full
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# add weight to the cells first..last (unwrapped) of the rows in the difference array (rows x columns + 1)
+# intervals crossing the map edge are split in two, empty intervals are skipped
+def Add_Intervals(difference, row, first, last, weight):
+    columns = difference.shape[1] - 1
+    length = numpy.minimum(last - first + 1, columns)
+    keep = length > 0
+    row, first, length, weight = row[keep], numpy.mod(first[keep], columns), length[keep], weight[keep]
+
+    end = first + length                    # exclusive, may exceed columns (wrapped part)
+    wrapped = end > columns
+    flat = numpy.concatenate([
+        row * (columns + 1) + first,
+        row * (columns + 1) + numpy.minimum(end, columns),
+        row[wrapped] * (columns + 1),
+        row[wrapped] * (columns + 1) + end[wrapped] - columns,
+    ])
+    flat_weight = numpy.concatenate([weight, -weight, weight[wrapped], -weight[wrapped]])
+    difference += numpy.bincount(flat, weights=flat_weight, minlength=difference.size).reshape(difference.shape)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# points in time of the coverage scan: equally spaced over the calculation window, so that no ground track moves more
+# than 1 / COVERAGE_SCAN_DENSITY cap radii between two points (bound: the fastest satellite at perigee plus the earth
+# rotation)
+def Generate_Scan_Grid(list_satrec, cap_radius):
+    max_rate = numpy.max(__FUNCTIONS.Calc_Angular_Rate_Bound(list_satrec))
+    step_count = max(1, int(numpy.ceil((__INPUTS.TIME_END - __INPUTS.TIME_START) * 86400 * max_rate * __SETTINGS.COVERAGE_SCAN_DENSITY / cap_radius)))
+
+    return __INPUTS.TIME_START + (__INPUTS.TIME_END - __INPUTS.TIME_START) * numpy.arange(step_count + 1) / step_count
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# accumulate the caps of one block into the difference arrays of the visits and of the time in view [days]
+# (the first point of every satellite only serves as previous point, unless first_block)
+def Accumulate_Block(difference_visits, difference_time, lat, lon, point_duration, cap_radius, first_block):
+    rows, columns = difference_visits.shape[0], difference_visits.shape[1] - 1
+    if rows not in ROW_SIN:
+        row_lat = (numpy.arange(rows) + 0.5) * numpy.pi / rows - numpy.pi / 2
+        ROW_SIN[rows], ROW_COS[rows] = numpy.sin(row_lat), numpy.cos(row_lat)
+    row_count = int(numpy.ceil(2 * cap_radius / (numpy.pi / rows))) + 2
+    centre_row = numpy.floor((lat + numpy.pi / 2) / (numpy.pi / rows)).astype(numpy.int64)
+    sin_lat, cos_lat = numpy.sin(lat), numpy.cos(lat)
+    # points in the same row as their previous point reuse its interval, the others calculate it on their row
+    same_row = centre_row[:, 1:] == centre_row[:, :-1]
+    satellite, point = numpy.nonzero(~same_row)
+
+    for offset in range(-(row_count // 2), row_count - row_count // 2):
+        # interval of every point on its own row, and of its previous point on the same row
+        row_all = centre_row + offset
+        first_all, last_all, full_all = Calc_Row_Intervals(lat, sin_lat, cos_lat, lon, row_all, cap_radius, rows, columns)
+        first, last, full, row = first_all[:, 1:], last_all[:, 1:], full_all[:, 1:], row_all[:, 1:]
+        first_previous, last_previous, full_previous = first_all[:, :-1].copy(), last_all[:, :-1].copy(), full_all[:, :-1].copy()
+        first_previous[satellite, point], last_previous[satellite, point], full_previous[satellite, point] = Calc_Row_Intervals(lat[satellite, point], sin_lat[satellite, point], cos_lat[satellite, point], lon[satellite, point], row[satellite, point], cap_radius, rows, columns)
+
+        # previous interval shifted by whole turns next to the current one; a full current row starts where the previous
+        # interval starts (the new part is then one interval behind it), a full previous row covers everything
+        shift = numpy.round(((first + last) - (first_previous + last_previous)) / 2 / columns).astype(numpy.int64) * columns
+        shift = numpy.where(full, 0, shift)
+        first_previous, last_previous = first_previous + shift, last_previous + shift
+        first = numpy.where(full, first_previous, first)
+        last = numpy.where(full, first_previous + columns - 1, last)
+        empty_previous = last_previous < first_previous
+        covered = full_previous & ~full
+
+        # new cells: current interval without the previous one (before and behind it)
+        before_last = numpy.where(empty_previous, last, numpy.minimum(last, first_previous - 1))
+        behind_first = numpy.maximum(first, last_previous + 1)
+        behind_last = numpy.where(empty_previous | covered, behind_first - 1, last)
+        before_last = numpy.where(covered, first - 1, before_last)
+
+        valid = (row >= 0) & (row < rows)
+        ones = numpy.ones(numpy.count_nonzero(valid))
+        Add_Intervals(difference_visits, row[valid], first[valid], before_last[valid], ones)
+        Add_Intervals(difference_visits, row[valid], behind_first[valid], behind_last[valid], ones)
+        Add_Intervals(difference_time, row[valid], first[valid], last[valid], ones * point_duration)
+
+        if first_block:
+            # the very first point of the window has no previous point: all of its cells are new
+            valid = (row_all[:, 0] >= 0) & (row_all[:, 0] < rows)
+            Add_Intervals(difference_visits, row_all[valid, 0], first_all[valid, 0], last_all[valid, 0], numpy.ones(numpy.count_nonzero(valid)))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# coverage of all satellites over the calculation window (scan grid of Generate_Scan_Grid)
+# returns a dict of arrays: visits (number of overflights per cell, rows from south to north), time (time in view [h]),
+# mean_revisit (window length / visits [h], inf for cells never seen), lat and lon (cell centres [deg])
+# (cancel: see functions.Check_Cancel)
+@__PROFILING.Stage("coverage")
+def Calc_Coverage(cancel=None):
+    list_names, list_satrec = __FUNCTIONS.Get_Satellites()
+    rows = int(round(180 / __SETTINGS.COVERAGE_RESOLUTION))
+    columns = 2 * rows
+    cap_radius = Get_Cap_Radius()
+    difference_visits = numpy.zeros((rows, columns + 1))
+    difference_time = numpy.zeros((rows, columns + 1))
+
+    # blocks of satellites and points in time, about STREAM_CHUNK_SIZE points each
+    satellite_block = max(1, min(len(list_satrec), __SETTINGS.STREAM_CHUNK_SIZE // 16))
+    time_block = max(2, __SETTINGS.STREAM_CHUNK_SIZE // satellite_block)
+    list_times = Generate_Scan_Grid(list_satrec, cap_radius)
+    point_duration = list_times[1] - list_times[0]
+    for first_satellite in range(0, len(list_satrec), satellite_block):
+        satrec_array = __FUNCTIONS.SatrecArray(list_satrec[first_satellite:first_satellite + satellite_block])
+        for start in range(0, max(len(list_times) - 1, 1), time_block - 1):
+            __FUNCTIONS.Check_Cancel(cancel)
+            times = list_times[start:start + time_block]
+            teme_position, teme_velocity = __FUNCTIONS.Propagate_TEME(list_times=times, satrec=satrec_array)
+            lat, lon, height = __FUNCTIONS.TEME_to_GEODETIC_Native(list_times=times, teme_position=teme_position)
+            Accumulate_Block(difference_visits, difference_time, numpy.deg2rad(lat), numpy.deg2rad(lon), point_duration, cap_radius, first_block=start == 0)
+
+    visits = numpy.rint(numpy.cumsum(difference_visits, axis=1)[:, :-1]).astype(numpy.int64)
+    time_in_view = numpy.cumsum(difference_time, axis=1)[:, :-1] * 24
+    with numpy.errstate(divide="ignore"):
+        mean_revisit = (list_times[-1] - list_times[0]) * 24 / visits
+
+    return {
+        "visits": visits,
+        "time": numpy.maximum(time_in_view, 0),
+        "mean_revisit": mean_revisit,
+        "lat": -90 + (numpy.arange(rows) + 0.5) * __SETTINGS.COVERAGE_RESOLUTION,
+        "lon": -180 + (numpy.arange(columns) + 0.5) * __SETTINGS.COVERAGE_RESOLUTION,
+    }
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# draw the visits as heatmap over the map image (cells never seen stay transparent)
+def Draw_Coverage(ax_Map, coverage):
+    ax_Map.imshow(numpy.ma.masked_equal(coverage["visits"], 0), extent=[-180, 180, -90, 90], origin="lower", cmap=__SETTINGS.COVERAGE_COLORMAP, alpha=__SETTINGS.COVERAGE_ALPHA, interpolation="nearest", zorder=1)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# save all coverage arrays to a numpy .npz file
+def Export_Coverage(coverage, exportpath):
+    numpy.savez_compressed(exportpath, **coverage)
@@ -1,68 +1,523 @@
 # FUNCTIONS
-import astropy.coordinates
 # library imports
+import re
+import datetime
+import threading
 import numpy
+import PIL.Image
 
-from sgp4.api import Satrec
-from sgp4.api import SGP4_ERRORS
-
-from astropy.coordinates import TEME, CartesianDifferential, CartesianRepresentation, ITRS
-from astropy import units
-from astropy.time import Time
+import matplotlib.image
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
 
 # import of own functions and variables
 import settings as __SETTINGS
 import inputs as __INPUTS
+import cache as __CACHE
+import profiling as __PROFILING
+
+# maximum deviation of the numpy transform backend from astropy over all transforms of the current run, set by the
+# "compare" backend (reset with Reset_Transform_Deviation)
+TRANSFORM_DEVIATION: dict = {}
+
+# sgp4 and astropy take long to import, they are only imported on first use (Load_SGP4, Load_Astropy) or by Warm_Up
+Satrec = SatrecArray = SGP4_ERRORS = None
+TEME = CartesianRepresentation = ITRS = units = Time = None
+LIBRARY_LOCK = threading.Lock()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# raised by Check_Cancel inside the block loops of a calculation, when it was cancelled
+class Cancelled(Exception):
+    pass
+
+
+# stop the calculation between two blocks, if the cancel event (threading.Event) is set (None: cannot be cancelled)
+def Check_Cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# import sgp4 (once)
+def Load_SGP4():
+    global Satrec, SatrecArray, SGP4_ERRORS
+
+    with LIBRARY_LOCK:
+        if SGP4_ERRORS is None:
+            from sgp4.api import Satrec, SatrecArray, SGP4_ERRORS
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# import astropy (once), only needed by the astropy transform backend
+def Load_Astropy():
+    global TEME, CartesianRepresentation, ITRS, units, Time
+
+    with LIBRARY_LOCK:
+        if Time is None:
+            from astropy.coordinates import TEME, CartesianRepresentation, ITRS
+            from astropy import units
+            from astropy.time import Time
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# import the libraries and run one transform in the background after the start, so the first plot does not wait for
+# the imports and the earth orientation tables of astropy (errors are ignored, they show up again on the first plot)
+def Warm_Up():
+    try:
+        Load_SGP4()
+        if __SETTINGS.TRANSFORM_BACKEND != "numpy":
+            Load_Astropy()
+            time_now = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")[:19]
+            TEME_to_GEODETIC(list_times=numpy.array([ISO_to_JD(time_now)]), teme_position=numpy.array([[7000.0, 0.0, 0.0]]))
+    except Exception:
+        pass
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# convert a time in ISO format (UTC, e.g. 2024-01-01T12:00:00) to jd-format, without astropy (no leap second handling,
+# same as astropy for every time except during a leap second)
+def ISO_to_JD(time_string):
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{1,2})(?::(\d{1,2}(?:\.\d*)?))?)?", time_string.strip())
+    if match is None:
+        raise ValueError(f"Invalid time: {time_string}")
+    year, month, day, hour, minute, second = match.groups(default="0")
+    time_utc = datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), tzinfo=datetime.timezone.utc)
+
+    return (time_utc.timestamp() + float(second)) / 86400 + 2440587.5
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# julian date (UTC) -> "YYYY-MM-DD HH:MM:SS", rounded to full seconds
+def JD_to_ISO(jd):
+    time_utc = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=round((jd - 2440587.5) * 86400))
+
+    return time_utc.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# propagated satellite data of one or more satellites over one shared time grid, as contiguous numpy arrays
+# (one row per satellite, a single TLE is a track with one row):
+# times (T), lat, lon [deg], height [km] (S x T), TEME position [km], velocity [km/s] (S x T x 3), speed [km/s] (S x T),
+# colors (S x T-1 x rgb, one per segment, set by Calc_Colors)
+class GroundTrack:
+    __slots__ = ("times", "lat", "lon", "height", "position", "velocity", "speed", "colors")
+
+    def __init__(self, times, position, velocity, lat, lon, height, colors=None):
+        self.times = numpy.asarray(times, dtype=float)
+        count = len(self.times)
+        self.position = numpy.reshape(position, (-1, count, 3))
+        self.velocity = numpy.reshape(velocity, (-1, count, 3))
+        self.lat = numpy.reshape(lat, (-1, count))
+        self.lon = numpy.reshape(lon, (-1, count))
+        self.height = numpy.reshape(height, (-1, count))
+        self.speed = numpy.sqrt(numpy.sum(numpy.square(self.velocity), axis=-1))
+        self.colors = colors
+
+    # number of satellites
+    def __len__(self):
+        return self.lat.shape[0]
+
+    # the track of one satellite (views, no copies)
+    def Row(self, satellite):
+        row = GroundTrack.__new__(GroundTrack)
+        for name in ("position", "velocity", "lat", "lon", "height", "speed", "colors"):
+            array = getattr(self, name)
+            setattr(row, name, None if array is None else array[satellite:satellite + 1])
+        row.times = self.times
+
+        return row
+
+    # first and last point in time, merged with an earlier (min, max) time range (for the time axis of several plots)
+    def Time_Range(self, time_range=None):
+        if time_range is None:
+            return float(self.times[0]), float(self.times[-1])
+
+        return min(time_range[0], float(self.times[0])), max(time_range[1], float(self.times[-1]))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# generate the ground track of the loaded catalog or, if no catalog is loaded, of the single TLE; generates the colors,
+# that are used to color the plot (the whole time window is kept as arrays, propagated in blocks, see Propagate_Blocks)
+def GenerateGeodetics(check_colors, cancel=None):
+    track = Propagate_Window(satrec=Get_SatrecArray() if len(__INPUTS.TLE_CATALOG) != 0 else Get_Satrec(), cancel=cancel)
+
+    Calc_Colors(track=track, check_colors=check_colors)
+
+    return track
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# chunked streaming mode: generate the ground track block by block (Get_Chunk_Length points in time each), so the
+# memory stays bounded no matter how long the calculation window is and how many satellites there are; yields one
+# GroundTrack per block
+# every block starts with the last point of the previous one, so the drawn lines stay connected
+# the speed colors are scaled by the minimum and maximum orbital speed, as the speeds of later blocks are not known yet
+def GenerateGeodetics_Chunks(check_colors, cancel=None):
+    if len(__INPUTS.TLE_CATALOG) != 0:
+        satrec = Get_SatrecArray()
+        speed_range = Calc_Speed_Range([Satrec.twoline2rv(line1, line2) for name, line1, line2 in __INPUTS.TLE_CATALOG])
+    else:
+        satrec = Get_Satrec()
+        speed_range = Calc_Speed_Range([satrec])
+
+    for list_times in Generate_Time_Chunks():
+        track = Propagate_Blocks(list_times=list_times, satrec=satrec, cancel=cancel)
+        Calc_Colors(track=track, check_colors=check_colors, speed_range=speed_range)
+
+        yield track
+        # only one block is kept in memory at a time
+        del track
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# check, if the calculation window is long enough to be calculated in chunks (not used for adaptive sampling)
+def Use_Streaming():
+    return not __INPUTS.ADAPTIVE_SAMPLING and Get_Sample_Count() > Get_Chunk_Length()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# number of points in time per block of the streaming mode: about STREAM_CHUNK_SIZE samples (satellites x points in time)
+def Get_Chunk_Length():
+    satellite_count = max(len(__INPUTS.TLE_CATALOG), 1)
+
+    return max(2, __SETTINGS.STREAM_CHUNK_SIZE // satellite_count)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# read a TLE catalog file (two line or three line format) into a list of (name, line 1, line 2)
+def Load_TLE_Catalog(path):
+    list_catalog: list[(str, str, str)] = []
+
+    with open(path, "r") as catalog_file:
+        lines = [line.strip() for line in catalog_file if line.strip() != ""]
+
+    name = ""
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+            if name == "":
+                name = lines[i][2:7].strip()        # fall back to the catalog number
+            list_catalog.append((name, lines[i], lines[i + 1]))
+            name = ""
+            i += 2
+        else:
+            name = lines[i][2:].strip() if lines[i].startswith("0 ") else lines[i]
+            i += 1
+
+    if len(list_catalog) == 0:
+        raise Exception(f"No TLE found in catalog file {path}!")
+
+    return list_catalog
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# number of points in time of the calculation window
+def Get_Sample_Count():
+    return int(numpy.floor((__INPUTS.TIME_END - __INPUTS.TIME_START) / __INPUTS.TIME_INCREMENT)) + 1
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# generate all points in time of the calculation window, in jd-format
+# (first point is one increment after the start time, the last point is the first one past or at the end time)
+def Generate_Time_Grid():
+    sample_count = Get_Sample_Count()
+    list_times = __INPUTS.TIME_START + __INPUTS.TIME_INCREMENT * numpy.arange(start=1, stop=sample_count + 1)
+
+    return list_times
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# generate the points in time of the calculation window block by block (same points as Generate_Time_Grid), every block
+# after the first one starts with the last point of the previous block
+def Generate_Time_Chunks():
+    sample_count = Get_Sample_Count()
+    chunk_length = Get_Chunk_Length()
+    for start in range(0, sample_count, chunk_length):
+        stop = min(start + chunk_length, sample_count)
+        yield __INPUTS.TIME_START + __INPUTS.TIME_INCREMENT * numpy.arange(start=max(start, 1), stop=stop + 1)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# propagate the satellite(s) over the calculation window, either on the fixed time grid or adaptively sampled
+# fixed time grids are taken from the on-disk cache, if enabled (only the missing points in time are propagated)
+def Propagate_Window(satrec, cancel=None):
+    if __INPUTS.ADAPTIVE_SAMPLING:
+        return Propagate_Adaptive(satrec=satrec, cancel=cancel)
+
+    list_times = Generate_Time_Grid()
+    if __SETTINGS.CACHE_ENABLED and __SETTINGS.TRANSFORM_BACKEND != "compare":
+        data = __CACHE.Load_or_Propagate(key=__CACHE.Get_Key(Get_TLE_Lines(satrec), __INPUTS.TIME_INCREMENT), list_times=list_times, time_increment=__INPUTS.TIME_INCREMENT, propagate=lambda list_missing_times: Propagate_Geodetics_Dict(list_times=list_missing_times, satrec=satrec, cancel=cancel))
+        return GroundTrack(times=list_times, position=data["position"], velocity=data["velocity"], lat=data["lat"], lon=data["lon"], height=data["height"])
+
+    return Propagate_Blocks(list_times=list_times, satrec=satrec, cancel=cancel)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# propagate the satellite(s) to an array of points in time and transform the positions to geodetic coordinates
+# (returns a GroundTrack without colors)
+def Propagate_Geodetics(list_times, satrec):
+    teme_position, teme_velocity = Propagate_TEME(list_times=list_times, satrec=satrec)
+    list_lat, list_lon, list_height = TEME_to_GEODETIC(list_times=list_times, teme_position=teme_position)
+
+    return GroundTrack(times=list_times, position=teme_position, velocity=teme_velocity, lat=list_lat, lon=list_lon, height=list_height)
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# generate list of geodetic coordinates of satellite positions; generates a list of colors, that are used to color the plot
-def GenerateGeodetics(check_colors):
-    list_teme: list[astropy.coordinates.TEME()] = []
-    list_lon: list[float] = []
-    list_lat: list[float] = []
-    list_height: list[float] = []
-    list_times: list[float] = []
+# same as Propagate_Geodetics, but in blocks of about STREAM_CHUNK_SIZE samples (satellites x points in time), so the
+# calculation can be cancelled between two blocks
+def Propagate_Blocks(list_times, satrec, cancel):
+    satellite_count = len(satrec) if isinstance(satrec, SatrecArray) else 1
+    block_size = max(1, __SETTINGS.STREAM_CHUNK_SIZE // satellite_count)
 
-    calc_time = __INPUTS.TIME_START
-    while calc_time <= __INPUTS.TIME_END:       # time loop
-        calc_time += __INPUTS.TIME_INCREMENT
-        t = Time(calc_time, format='jd')
+    list_blocks = []
+    for start in range(0, max(len(list_times), 1), block_size):
+        Check_Cancel(cancel)
+        list_blocks.append(Propagate_Geodetics(list_times=list_times[start:start + block_size], satrec=satrec))
+    if len(list_blocks) == 1:
+        return list_blocks[0]
 
-        teme = Get_TEME(time=t)
-        itrs = TEME_to_ITRS(time=t, teme=teme)
-        gcs_lat, gcs_lon, gcs_height = ITRS_to_GEODETIC(itrs)
+    return GroundTrack(
+        times=list_times,
+        position=numpy.concatenate([block.position for block in list_blocks], axis=1),
+        velocity=numpy.concatenate([block.velocity for block in list_blocks], axis=1),
+        lat=numpy.concatenate([block.lat for block in list_blocks], axis=1),
+        lon=numpy.concatenate([block.lon for block in list_blocks], axis=1),
+        height=numpy.concatenate([block.height for block in list_blocks], axis=1),
+    )
 
-        list_teme.append(teme)
-        list_lat.append(gcs_lat)
-        list_lon.append(gcs_lon)
-        list_height.append(gcs_height)
-        list_times.append(calc_time)
 
-    list_segColors = Calc_Colors(list_teme=list_teme, check_colors=check_colors)
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# same as Propagate_Blocks, but returns a dict as needed by the cache
+def Propagate_Geodetics_Dict(list_times, satrec, cancel=None):
+    track = Propagate_Blocks(list_times=list_times, satrec=satrec, cancel=cancel)
 
-    return list_lat, list_lon, list_segColors, list_height, list_times
+    return {"position": track.position, "velocity": track.velocity, "lat": track.lat, "lon": track.lon, "height": track.height}
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# get satellite data in TEME reference frame for a specific point in time
-def Get_TEME(time):
+# the TLE lines belonging to a satellite record (single TLE) or a satellite record array (catalog)
+def Get_TLE_Lines(satrec):
+    if isinstance(satrec, SatrecArray):
+        return [line for name, line1, line2 in __INPUTS.TLE_CATALOG for line in (line1, line2)]
+
+    return [__INPUTS.TLE[0], __INPUTS.TLE[1]]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# adaptive sampling: only uses the points of the fixed time grid, that are needed to draw the track within a tolerance
+# starts with a coarse grid (ADAPTIVE_MAX_STEP) and bisects every interval, whose midpoint deviates more than
+# ADAPTIVE_TOLERANCE_PX pixels (at PLOT_DPI) from the straight line between its ends, on the map or in the height plot;
+# intervals crossing the map edge are always bisected, so the edge interpolation is as exact as with the fixed grid
+# for a catalog an interval is bisected, if any satellite needs it (the grid is shared)
+@__PROFILING.Stage("adaptive sampling")
+def Propagate_Adaptive(satrec, cancel=None):
+    list_grid = Generate_Time_Grid()
+    stride = max(1, int(__SETTINGS.ADAPTIVE_MAX_STEP / __INPUTS.TIME_INCREMENT))
+    list_indices = numpy.unique(numpy.concatenate([numpy.arange(start=0, stop=len(list_grid), step=stride), [len(list_grid) - 1]]))
+
+    track = Propagate_Blocks(list_times=list_grid[list_indices], satrec=satrec, cancel=cancel)
+
+    # pixels per degree on the map and per km in the height plot (height plot takes a third of the figure height)
+    px_per_deg = __SETTINGS.PLOT_ONSCREEN_WIDTH * __SETTINGS.PLOT_DPI / 360
+    px_per_km = __SETTINGS.PLOT_ONSCREEN_HEIGHT * __SETTINGS.PLOT_DPI / 3 / max(float(numpy.nanmax(track.height) - numpy.nanmin(track.height)), 1)
+
+    while True:
+        index_a = list_indices[:-1]
+        index_b = list_indices[1:]
+        splittable = numpy.flatnonzero(index_b - index_a > 1)
+        if len(splittable) == 0:
+            break
+        index_m = (index_a[splittable] + index_b[splittable]) // 2
+        w = (index_m - index_a[splittable]) / (index_b[splittable] - index_a[splittable])
+
+        mid = Propagate_Blocks(list_times=list_grid[index_m], satrec=satrec, cancel=cancel)
+
+        lat_a, lat_b = track.lat[:, splittable], track.lat[:, splittable + 1]
+        lon_a, lon_b = track.lon[:, splittable], track.lon[:, splittable + 1]
+        height_a, height_b = track.height[:, splittable], track.height[:, splittable + 1]
+        # longitudes relative to the start of the interval, unwrapped at the map edge
+        dlon_ab = numpy.mod(lon_b - lon_a + 180, 360) - 180
+        dlon_am = numpy.mod(mid.lon - lon_a + 180, 360) - 180
+        error_map = numpy.hypot(dlon_am - w * dlon_ab, mid.lat - (lat_a + w * (lat_b - lat_a))) * px_per_deg
+        error_height = numpy.abs(mid.height - (height_a + w * (height_b - height_a))) * px_per_km
+        overflow = numpy.abs(lon_b - lon_a) > __SETTINGS.LONGITUDE_JUMP_CUTOFF
+        refine = (error_map > __SETTINGS.ADAPTIVE_TOLERANCE_PX) | (error_height > __SETTINGS.ADAPTIVE_TOLERANCE_PX) | overflow
+        refine = numpy.any(refine, axis=0)
+        if not numpy.any(refine):
+            break
+
+        # merge the new points into the sorted samples
+        list_indices = numpy.concatenate([list_indices, index_m[refine]])
+        order = numpy.argsort(list_indices, kind="stable")
+        list_indices = list_indices[order]
+        track = GroundTrack(
+            times=list_grid[list_indices],
+            position=numpy.concatenate([track.position, mid.position[:, refine]], axis=1)[:, order],
+            velocity=numpy.concatenate([track.velocity, mid.velocity[:, refine]], axis=1)[:, order],
+            lat=numpy.concatenate([track.lat, mid.lat[:, refine]], axis=1)[:, order],
+            lon=numpy.concatenate([track.lon, mid.lon[:, refine]], axis=1)[:, order],
+            height=numpy.concatenate([track.height, mid.height[:, refine]], axis=1)[:, order],
+        )
+
+    return track
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# parse the TLE from the inputs into a satellite record
+def Get_Satrec():
+    Load_SGP4()
     tle_satrec = Satrec.twoline2rv(__INPUTS.TLE[0], __INPUTS.TLE[1])
-    error_code, teme_position, teme_velocity = tle_satrec.sgp4(time.jd1, time.jd2)
 
-    if error_code != 0:
-        raise RuntimeError(SGP4_ERRORS[error_code])
+    return tle_satrec
 
-    teme_position = CartesianRepresentation(teme_position * units.km)  # setup TEME to use SI units
-    teme_velocity = CartesianDifferential(teme_velocity * units.km / units.s)
 
-    teme = TEME(teme_position.with_differentials(teme_velocity), obstime=time)
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# parse all TLEs of the catalog from the inputs into one array of satellite records
+def Get_SatrecArray():
+    Load_SGP4()
+    catalog_satrec = SatrecArray([Satrec.twoline2rv(line1, line2) for name, line1, line2 in __INPUTS.TLE_CATALOG])
 
-    return teme
+    return catalog_satrec
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# transform satellite data from TEME to ITRS reference frame for a specific point in time
+# names and satellite records of the loaded catalog or, if no catalog is loaded, of the single TLE
+def Get_Satellites():
+    Load_SGP4()
+    if len(__INPUTS.TLE_CATALOG) != 0:
+        return [name for name, line1, line2 in __INPUTS.TLE_CATALOG], [Satrec.twoline2rv(line1, line2) for name, line1, line2 in __INPUTS.TLE_CATALOG]
+
+    return [__INPUTS.TLE[0][2:7].strip()], [Get_Satrec()]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# propagate the satellite(s) to an array of points in time (jd-format), returns TEME position [km] and velocity [km/s]
+# with the xyz components in the last axis; for a single satellite an error is raised, for a catalog (SatrecArray)
+# failing satellites are left as NaN and not drawn
+@__PROFILING.Stage("sgp4")
+def Propagate_TEME(list_times, satrec=None):
+    tle_satrec = Get_Satrec() if satrec is None else satrec
+
+    jd = numpy.floor(numpy.atleast_1d(list_times))
+    fr = numpy.atleast_1d(list_times) - jd
+    if isinstance(tle_satrec, SatrecArray):
+        error_codes, teme_position, teme_velocity = tle_satrec.sgp4(jd, fr)
+    else:
+        error_codes, teme_position, teme_velocity = tle_satrec.sgp4_array(jd, fr)
+        if numpy.any(error_codes != 0):
+            raise RuntimeError(SGP4_ERRORS[int(error_codes[error_codes != 0][0])])
+
+    return teme_position, teme_velocity
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# propagate single satellites of a list of satellite records to individual points in time (one point in time per entry of
+# satellite), every satellite is propagated once for all of its points in time; failing points are left as NaN
+def Propagate_TEME_Points(list_satrec, satellite, times):
+    order = numpy.argsort(satellite, kind="stable")
+    satellite_sorted = satellite[order]
+    times_sorted = times[order]
+    bounds = numpy.concatenate([[0], numpy.flatnonzero(numpy.diff(satellite_sorted)) + 1, [len(order)]])
+
+    teme_position = numpy.empty((len(times), 3))
+    teme_velocity = numpy.empty((len(times), 3))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        jd = numpy.floor(times_sorted[start:end])
+        error_codes, position, velocity = list_satrec[satellite_sorted[start]].sgp4_array(jd, times_sorted[start:end] - jd)
+        position[error_codes != 0] = numpy.nan
+        teme_position[order[start:end]] = position
+        teme_velocity[order[start:end]] = velocity
+
+    return teme_position, teme_velocity
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# roots of function(index, times) -> (values, slopes [1/day] or None) between time_a and time_b, one per entry, by a
+# safeguarded newton iteration (slopes of the function, or the secant slope if it returns None; bisection whenever the
+# step leaves the bracket), vectorized: only the entries not converged yet (last step > tolerance) are evaluated
+# where the sign does not change, time_b is returned if the function is positive at both ends, otherwise time_a
+# (for a rate: the end with the larger value)
+def Find_Roots(function, time_a, time_b, tolerance):
+    index = numpy.arange(len(time_a))
+    value_a = function(index, time_a)[0]
+    value_b = function(index, time_b)[0]
+    roots = numpy.where(value_a >= 0, time_b, time_a)
+
+    bracket = numpy.flatnonzero((value_a >= 0) != (value_b >= 0))
+    time_a, time_b, value_a, value_b = time_a[bracket], time_b[bracket], value_a[bracket], value_b[bracket]
+    # the first estimate is the secant of the bracket, its previous point (for secant slopes) the start of the bracket
+    estimate = time_b - value_b * (time_b - time_a) / (value_b - value_a)
+    previous, value_previous = time_a.copy(), value_a.copy()
+    active = numpy.arange(len(bracket))
+    while len(active) != 0:
+        x = estimate[active]
+        value, slope = function(bracket[active], x)
+        if slope is None:
+            slope = (value - value_previous[active]) / (x - previous[active])
+        previous[active], value_previous[active] = x, value
+
+        # shrink the bracket to the side with the sign change
+        replace_b = (value >= 0) == (value_b[active] >= 0)
+        time_b[active] = numpy.where(replace_b, x, time_b[active])
+        value_b[active] = numpy.where(replace_b, value, value_b[active])
+        time_a[active] = numpy.where(replace_b, time_a[active], x)
+        value_a[active] = numpy.where(replace_b, value_a[active], value)
+
+        step = x - value / slope
+        inside = (step > time_a[active]) & (step < time_b[active])
+        step = numpy.where(inside, step, (time_a[active] + time_b[active]) / 2)
+        estimate[active] = step
+        active = active[(numpy.abs(step - x) > tolerance) & (value != 0)]
+    roots[bracket] = estimate
+
+    return roots
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# transform TEME positions [km] to geodetic coordinates with the transform backend selected in the settings
+# ("astropy": astropy frame transforms, "numpy": fast native rotation, "compare": astropy, but the maximum deviation of the
+# numpy backend is added to TRANSFORM_DEVIATION)
+@__PROFILING.Stage("transform")
+def TEME_to_GEODETIC(list_times, teme_position):
+    if __SETTINGS.TRANSFORM_BACKEND == "numpy":
+        return TEME_to_GEODETIC_Native(list_times=list_times, teme_position=teme_position)
+
+    Load_Astropy()
+    t = Time(list_times, format='jd')
+    teme = TEME(CartesianRepresentation(numpy.moveaxis(teme_position, -1, 0) * units.km), obstime=t)
+    itrs = TEME_to_ITRS(time=t, teme=teme)
+    geod_lat, geod_lon, geod_height = ITRS_to_GEODETIC(itrs)
+    # astropy turns NaN positions (failed satellites) into the north pole, they stay NaN like with the numpy backend
+    failed = ~numpy.all(numpy.isfinite(teme_position), axis=-1)
+    geod_lat, geod_lon = numpy.where(failed, numpy.nan, geod_lat), numpy.where(failed, numpy.nan, geod_lon)
+
+    if __SETTINGS.TRANSFORM_BACKEND == "compare":
+        # adaptive sampling and streaming transform in several calls, the maximum of all of them is kept
+        deviation = Compare_Transform_Backends(list_times=list_times, teme_position=teme_position, astropy_geodetic=(geod_lat, geod_lon, geod_height))
+        for name, value in deviation.items():
+            TRANSFORM_DEVIATION[name] = max(TRANSFORM_DEVIATION.get(name, 0.0), value)
+
+    return geod_lat, geod_lon, geod_height
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# forget the deviation of the numpy transform backend of the last run (at the start of every run)
+def Reset_Transform_Deviation():
+    TRANSFORM_DEVIATION.clear()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# deviation of the numpy transform backend for the setup info ("" if nothing was compared in this run)
+def Format_Transform_Deviation():
+    if len(TRANSFORM_DEVIATION) == 0:
+        return ""
+
+    return f"Max. deviation numpy/astropy transform:\nlat: {TRANSFORM_DEVIATION['lat']:.2e} deg, lon: {TRANSFORM_DEVIATION['lon']:.2e} deg, height: {TRANSFORM_DEVIATION['height']:.2e} km"
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# transform satellite data from TEME to ITRS reference frame for an array of points in time
 def TEME_to_ITRS(time, teme):
     itrs_base = teme.transform_to(ITRS(obstime=time))
     itrs_earth = itrs_base.earth_location
@@ -71,154 +526,379 @@ def TEME_to_ITRS(time, teme):
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# transform satellite data from ITRS to geodetic coordinates
+# transform satellite data from ITRS to geodetic coordinates (the geodetic conversion is only done once for all points)
 def ITRS_to_GEODETIC(itrs):
-    geod_lat = itrs.geodetic.lat.degree
-    geod_lon = itrs.geodetic.lon.degree
-    geod_height = itrs.height.value
+    geodetic = itrs.geodetic
+    geod_lat = geodetic.lat.degree
+    geod_lon = geodetic.lon.degree
+    geod_height = geodetic.height.value
 
     return geod_lat, geod_lon, geod_height
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# calculate distances between points and generate rgb color values
-def Calc_Colors(list_teme, check_colors):
-    list_pointDist: list[float] = []
-    list_segColors: list[(float, float, float)] = []
+# fast native TEME to geodetic transformation, written directly in numpy
+# TEME -> PEF: rotation by the greenwich mean sidereal time (IAU-82, UT1 = UTC + UT1_UTC), PEF -> ITRS: polar motion,
+# ITRS -> geodetic: iterative WGS84 conversion
+def TEME_to_GEODETIC_Native(list_times, teme_position):
+    itrs_position = TEME_to_ITRS_Native(list_times=list_times, teme_position=teme_position)
 
-    for i in range(len(list_teme) - 1):
-        list_pointDist.append(float(numpy.sqrt(numpy.power(list_teme[i + 1].x.value - list_teme[i].x.value, 2) + numpy.power(list_teme[i + 1].y.value - list_teme[i].y.value, 2) + numpy.power(list_teme[i + 1].z.value - list_teme[i].z.value, 2))))
+    return ITRS_to_GEODETIC_Native(itrs_position)
 
-    dist_min = min(list_pointDist)
-    dist_max = max(list_pointDist)
 
-    for dist in list_pointDist:
-        r = 1
-        g = (dist - dist_min) * 1 / (dist_max - dist_min)
-        b = 0
-        if check_colors:
-            list_segColors.append((r, g, b))
-        else:
-            list_segColors.append(__INPUTS.PLOT_COLOR)
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# rotate TEME positions [km] into the ITRS frame for an array of points in time (jd-format)
+def TEME_to_ITRS_Native(list_times, teme_position):
+    list_times = numpy.asarray(list_times, dtype=float)
+    # greenwich mean sidereal time (IAU-82), in radians
+    jd_ut1 = numpy.floor(list_times)
+    fr_ut1 = list_times - jd_ut1 + __SETTINGS.UT1_UTC / 86400
+    t_ut1 = ((jd_ut1 - 2451545.0) + fr_ut1) / 36525
+    gmst = numpy.deg2rad(numpy.mod((24110.54841 + (8640184.812866 + (0.093104 - 6.2e-6 * t_ut1) * t_ut1) * t_ut1) / 240 + 360 * numpy.mod(fr_ut1 + 0.5, 1), 360))
+
+    # TEME -> PEF
+    x, y, z = teme_position[..., 0], teme_position[..., 1], teme_position[..., 2]
+    cos_gmst = numpy.cos(gmst)
+    sin_gmst = numpy.sin(gmst)
+    x_pef = cos_gmst * x + sin_gmst * y
+    y_pef = -sin_gmst * x + cos_gmst * y
+
+    # PEF -> ITRS (polar motion)
+    xp = numpy.deg2rad(__SETTINGS.POLAR_MOTION_X / 3600)
+    yp = numpy.deg2rad(__SETTINGS.POLAR_MOTION_Y / 3600)
+    x_itrs = numpy.cos(xp) * x_pef + numpy.sin(xp) * z
+    y_itrs = numpy.sin(xp) * numpy.sin(yp) * x_pef + numpy.cos(yp) * y_pef - numpy.cos(xp) * numpy.sin(yp) * z
+    z_itrs = -numpy.sin(xp) * numpy.cos(yp) * x_pef + numpy.sin(yp) * y_pef + numpy.cos(xp) * numpy.cos(yp) * z
+
+    return numpy.stack([x_itrs, y_itrs, z_itrs], axis=-1)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# transform ITRS positions [km] to geodetic coordinates on the WGS84 ellipsoid (lat, lon in degrees, height in km)
+def ITRS_to_GEODETIC_Native(itrs_position):
+    a = 6378.137
+    f = 1 / 298.257223563
+    e2 = f * (2 - f)
+
+    x, y, z = itrs_position[..., 0], itrs_position[..., 1], itrs_position[..., 2]
+    p = numpy.hypot(x, y)
+    lon = numpy.arctan2(y, x)
+
+    # fixed point iteration, converges to below a millimeter within a few steps for any orbit
+    lat = numpy.arctan2(z, p * (1 - e2))
+    for _ in range(5):
+        sin_lat = numpy.sin(lat)
+        N = a / numpy.sqrt(1 - e2 * sin_lat * sin_lat)
+        lat = numpy.arctan2(z + e2 * N * sin_lat, p)
+
+    sin_lat = numpy.sin(lat)
+    height = p * numpy.cos(lat) + z * sin_lat - a * numpy.sqrt(1 - e2 * sin_lat * sin_lat)
+
+    return numpy.rad2deg(lat), numpy.rad2deg(lon), height
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# compare the numpy transform backend with the astropy one (astropy_geodetic: lat, lon, height of the same positions),
+# returns the maximum deviation of lat, lon [deg] and height [km]
+def Compare_Transform_Backends(list_times, teme_position, astropy_geodetic):
+    astropy_lat, astropy_lon, astropy_height = astropy_geodetic
+    native_lat, native_lon, native_height = TEME_to_GEODETIC_Native(list_times=list_times, teme_position=teme_position)
+
+    deviation_lon = numpy.abs(numpy.mod(native_lon - astropy_lon + 180, 360) - 180)     # handle the jump at +-180 deg
+    deviation = {
+        "lat": float(numpy.nanmax(numpy.abs(native_lat - astropy_lat))),
+        "lon": float(numpy.nanmax(deviation_lon)),
+        "height": float(numpy.nanmax(numpy.abs(native_height - astropy_height))),
+    }
 
-    return list_segColors
+    return deviation
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# generate rgb color values (one per segment) from the speed of the satellite and store them in the track
+# (the speed of a segment is the mean of the speeds at both ends, so it works for adaptively sampled time grids as well)
+# every satellite is scaled by its own minimum and maximum speed; a fixed (min, max) speed range in km/s can be given
+# instead, e.g. from Calc_Speed_Range
+@__PROFILING.Stage("Calc_Colors")
+def Calc_Colors(track, check_colors, speed_range=None):
+    if not check_colors:
+        track.colors = numpy.broadcast_to(numpy.asarray(__INPUTS.PLOT_COLOR, dtype=numpy.float32), track.speed[:, 1:].shape + (3,)).copy()
+        return track.colors
+
+    list_segSpeed = 0.5 * (track.speed[:, :-1] + track.speed[:, 1:])
+    if speed_range is None:
+        speed_min = numpy.nanmin(list_segSpeed, axis=-1, keepdims=True)
+        speed_max = numpy.nanmax(list_segSpeed, axis=-1, keepdims=True)
+    else:
+        speed_min, speed_max = speed_range
+
+    track.colors = numpy.zeros(list_segSpeed.shape + (3,), dtype=numpy.float32)
+    track.colors[..., 0] = 1
+    # in PLOT_COLOR_STEPS steps, so neighbouring segments of the same color can be drawn as one piece
+    track.colors[..., 1] = numpy.round(numpy.clip((list_segSpeed - speed_min) / (speed_max - speed_min), 0, 1) * __SETTINGS.PLOT_COLOR_STEPS) / __SETTINGS.PLOT_COLOR_STEPS
+
+    return track.colors
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# minimum and maximum orbital speed (at apogee and perigee, vis-viva equation) of the satellites in km/s,
+# as (satellites x 1) arrays, to scale the speed colors without knowing the whole track
+def Calc_Speed_Range(list_satrec):
+    mu = 398600.4418        # km^3/s^2
+    a = numpy.array([[satrec.a * satrec.radiusearthkm] for satrec in list_satrec])
+    e = numpy.array([[satrec.ecco] for satrec in list_satrec])
+    speed_min = numpy.sqrt(mu / a * (1 - e) / (1 + e))
+    speed_max = numpy.sqrt(mu / a * (1 + e) / (1 - e))
+
+    return speed_min, speed_max
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# largest angular speed [rad/s] of the satellites over the rotating earth (orbital rate at perigee plus the earth
+# rotation), one value per satellite
+def Calc_Angular_Rate_Bound(list_satrec):
+    earth_rotation = 7.2921159e-5       # rad/s
+    e = numpy.array([satrec.ecco for satrec in list_satrec])
+    n = numpy.array([satrec.no_kozai for satrec in list_satrec]) / 60        # rad/s
+
+    return n * (1 + e) ** 2 / (1 - e ** 2) ** 1.5 + earth_rotation
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # split up the position data and draw the data onto the map
 def Split_and_Draw(list_lat, list_lon, ax, list_segColors, draw_arrows):
-    subList_lat: list[float] = []
-    subList_lon: list[float] = []
-    subList_segColors: list[(float, float, float, float)] = []
-
-    last_overflow = 0
-    for i in range(len(list_lat) - 1):
-        if numpy.abs(list_lon[i] - list_lon[i + 1]) > __SETTINGS.LONGITUDE_JUMP_CUTOFF:
-            # generate sublists, which are not interrupted by a "map overflow"
-            for j in range(last_overflow, i+1):
-                subList_lat.append(list_lat[j])
-                subList_lon.append(list_lon[j])
-                subList_segColors.append(list_segColors[j])
-            # interpolate, so that the lines are drawn right to the edge of the plot, if a cutoff happens immediately after
-            interp_lat = 0
-            if list_lon[i + 1] < 0:
-                point_projected_lon = list_lon[i + 1] + 360
-                point_projected_lat = list_lat[i + 1]
-                # cal m(x - c) + b
-                b = list_lat[i]
-                c = list_lon[i]
-                m = (point_projected_lat - list_lat[i]) / (point_projected_lon - list_lon[i])
-                # interpolate for x = 180deg
-                interp_lat = m * (180 - c) + b
-                interp_lon = 180
-                subList_lat.append(interp_lat)
-                subList_lon.append(interp_lon)
-                subList_segColors.append(list_segColors[i])
-            if list_lon[i + 1] > 0:
-                point_projected_lon = list_lon[i + 1] - 360
-                point_projected_lat = list_lat[i + 1]
-                # cal m(x - c) + b
-                b = list_lat[i]
-                c = list_lon[i]
-                m = (point_projected_lat - list_lat[i]) / (point_projected_lon - list_lon[i])
-                # interpolate for x = -180deg
-                interp_lat = m * (-180 - c) + b
-                interp_lon = -180
-                subList_lat.append(interp_lat)
-                subList_lon.append(interp_lon)
-                subList_segColors.append(list_segColors[i])
-            # plot the sublists pair by pair, to apply a different color to every segment (depending on the speed of the satellite)
-            for k in range(len(subList_lat) - 1):
-                twoPoints_lat = [subList_lat[k], subList_lat[k + 1]]
-                twoPoints_lon = [subList_lon[k], subList_lon[k + 1]]
-                ax.plot(twoPoints_lon, twoPoints_lat, linewidth=1, color=subList_segColors[k])
-            if draw_arrows:
-                add_Arrow(ax, subList_lon, subList_lat, subList_segColors)
-            last_overflow = i + 1
-            subList_lat.clear()
-            subList_lon.clear()
-            subList_segColors.clear()
-            # interpolate, so that entering lines are drawn right to the edge of the plot, if a cutoff happened right before
-            # uses the calculated interpolated latitudes from above
-            if list_lon[i] > 0:
-                interp_lon = -180
-                subList_lat.append(interp_lat)
-                subList_lon.append(interp_lon)
-                subList_segColors.append(list_segColors[i])
-            if list_lon[i] < 0:
-                interp_lon = 180
-                subList_lat.append(interp_lat)
-                subList_lon.append(interp_lon)
-                subList_segColors.append(list_segColors[i])
-
-    for j in range(last_overflow, len(list_lat)):
-        subList_lat.append(list_lat[j])
-        subList_lon.append(list_lon[j])
-        if j < len(list_segColors):
-            subList_segColors.append(list_segColors[j])
-    for k in range(len(subList_lat) - 1):
-        twoPoints_lat = [subList_lat[k], subList_lat[k + 1]]
-        twoPoints_lon = [subList_lon[k], subList_lon[k + 1]]
-        ax.plot(twoPoints_lon, twoPoints_lat, linewidth=1, color=subList_segColors[k])
-    if draw_arrows:
-        add_Arrow(ax, subList_lon, subList_lat, subList_segColors)
+    split_lat, split_lon, split_segColors, list_bounds = Split_Track(list_lat=list_lat, list_lon=list_lon, list_segColors=list_segColors)
+
+    # plot every sublist as one line collection, to apply a different color to every segment (depending on the speed of the satellite)
+    for start, stop in zip(list_bounds[:-1], list_bounds[1:]):
+        Draw_LineCollection(ax, split_lon[start:stop], split_lat[start:stop], split_segColors[start:stop])
+        if draw_arrows:
+            add_Arrow(ax, split_lon[start:stop], split_lat[start:stop], split_segColors[start:stop])
 
     return ax
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# draw height map
-def draw_Height_Map(list_times, list_height, complete_time_list, list_segColors, ax_Height):
-    for i in range(len(list_times) - 1):
-        times = [list_times[i], list_times[i + 1]]
-        heights = [list_height[i], list_height[i + 1]]
-        segColor = list_segColors[i]
-        ax_Height.plot(times, heights, linewidth=1, color=segColor)
+# split up the position data into sublists, which are not interrupted by a "map overflow"
+# all overflows are found at once; two interpolated points are inserted at every overflow, so that the lines are drawn right
+# to the edge of the plot (leaving at one edge, entering at the other one)
+# returns the extended data (one color per point, the color of the segment starting there) and the start index of every
+# sublist plus the total length, so sublist k is [list_bounds[k]:list_bounds[k + 1]] (slices are views, not copies)
+@__PROFILING.Stage("antimeridian split")
+def Split_Track(list_lat, list_lon, list_segColors):
+    list_lat = numpy.asarray(list_lat, dtype=float)
+    list_lon = numpy.asarray(list_lon, dtype=float)
+    list_segColors = numpy.asarray(list_segColors, dtype=float)
+    # pad the segment colors to one color per point
+    list_pointColors = numpy.concatenate([list_segColors[:len(list_lat) - 1], list_segColors[-1:]])[:len(list_lat)]
 
-    min_time = min(complete_time_list)
-    max_time = max(complete_time_list)
-    time_stepsize = (max_time - min_time) / __SETTINGS.HEIGHT_PLOT_TIME_STEPS
+    overflows = numpy.flatnonzero(numpy.abs(numpy.diff(list_lon)) > __SETTINGS.LONGITUDE_JUMP_CUTOFF)
 
-    min_time_label = 0
-    max_time_label = (max_time - min_time) * 24 * 60
-    time_stepsize_label = time_stepsize * 24 * 60
+    # interpolate the latitude at the edge, using the point after the overflow projected beyond the edge
+    edge_lon = numpy.where(list_lon[overflows + 1] < 0, 180, -180)
+    point_projected_lon = list_lon[overflows + 1] + 2 * edge_lon
+    m = (list_lat[overflows + 1] - list_lat[overflows]) / (point_projected_lon - list_lon[overflows])
+    interp_lat = m * (edge_lon - list_lon[overflows]) + list_lat[overflows]
 
-    xlabels: list[str] = []
-    for time in numpy.arange(start=min_time_label, stop=max_time_label, step=time_stepsize_label):
-        xlabels.append(str(numpy.round(time, 0)))
+    # insert the leaving and the entering edge point after every overflow (both use the color of the interrupted segment)
+    insert_at = numpy.repeat(overflows + 1, 2)
+    split_lat = numpy.insert(list_lat, insert_at, numpy.repeat(interp_lat, 2))
+    split_lon = numpy.insert(list_lon, insert_at, numpy.column_stack([edge_lon, -edge_lon]).ravel())
+    split_segColors = numpy.insert(list_pointColors, insert_at, numpy.repeat(list_pointColors[overflows], 2, axis=0), axis=0)
+
+    list_bounds = numpy.concatenate([[0], overflows + 2 + 2 * numpy.arange(len(overflows)), [len(split_lat)]])
+
+    return split_lat, split_lon, split_segColors, list_bounds
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# draw a continuous line as a single line collection, every segment between two points gets its own color
+# (list_segColors: one color per point, the color of the segment starting there); the line is reduced to the points
+# needed to draw it at PLOT_DPI first, so the artists only keep what can be seen, no matter how many samples there are
+@__PROFILING.Stage("artists")
+def Draw_LineCollection(ax, xdata, ydata, list_segColors):
+    if len(xdata) < 2:
+        return None
+
+    # pixels per degree at PLOT_DPI (the map spread over the whole figure width, so never coarser than the export)
+    px_per_deg = __SETTINGS.PLOT_ONSCREEN_WIDTH * __SETTINGS.PLOT_DPI / 360
+    list_pointColors = numpy.asarray(list_segColors)[:len(xdata)]
+    keep = Reduce_Line(numpy.asarray(xdata) * px_per_deg, numpy.asarray(ydata) * px_per_deg, list_pointColors)
+    xdata, ydata, list_pointColors = xdata[keep], ydata[keep], list_pointColors[keep]
+
+    if __SETTINGS.PLOT_DECIMATION:
+        collection = Decimated_LineCollection(xdata=xdata, ydata=ydata, list_pointColors=list_pointColors, envelope=False, linewidths=1)
+    else:
+        list_pieces, list_pieceColors = Build_Pieces(xdata, ydata, list_pointColors)
+        collection = LineCollection(list_pieces, colors=list_pieceColors, linewidths=1)
+    ax.add_collection(collection)
+
+    return collection
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# points of a line (display coordinates [px], one color per point) that are needed to draw it within PLOT_TOLERANCE_PX:
+# stretches of 2, 4, 8, ... segments (aligned to their length) are drawn as one segment, if all of their points are
+# within the tolerance of that segment and all of their segments have the same color; the longest such stretches are
+# chosen, points with NaN are always kept (gaps stay gaps)
+# returns a boolean mask of the kept points
+def Reduce_Line(x_px, y_px, list_pointColors):
+    count = len(x_px)
+    keep = numpy.ones(count, dtype=bool)
+    check_colors = numpy.any(list_pointColors != list_pointColors[:1])
+
+    # stretches that can be drawn as one segment, from the shortest to the one covering the whole line
+    list_mergeable = []
+    stride = 2
+    while stride // 2 < count - 1:
+        start = numpy.arange(count) // stride * stride
+        end = numpy.minimum(start + stride, count - 1)
+        dx, dy = x_px[end] - x_px[start], y_px[end] - y_px[start]
+        length_2 = dx * dx + dy * dy
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            t = numpy.clip(numpy.where(length_2 > 0, ((x_px - x_px[start]) * dx + (y_px - y_px[start]) * dy) / length_2, 0), 0, 1)
+        distance = numpy.hypot(x_px - x_px[start] - t * dx, y_px - y_px[start] - t * dy)
+
+        padded = numpy.zeros(-(-count // stride) * stride)
+        padded[:count] = distance
+        mergeable = numpy.max(padded.reshape(-1, stride), axis=1) <= __SETTINGS.PLOT_TOLERANCE_PX
+        if check_colors:
+            padded = numpy.repeat(list_pointColors[-1:], len(padded), axis=0)
+            padded[:count] = list_pointColors
+            padded = padded.reshape(-1, stride, padded.shape[-1])
+            mergeable &= numpy.all(padded == padded[:, :1], axis=(1, 2))
+        list_mergeable.append(mergeable)
+        stride *= 2
 
-    if len(xlabels) < len(numpy.arange(start=min_time, stop=max_time, step=time_stepsize)):
-        for i in range(len(numpy.arange(start=min_time, stop=max_time, step=time_stepsize)) - len(xlabels)):
-            xlabels.append(str(numpy.round(max_time_label, 0)))
-    elif len(xlabels) > len(numpy.arange(start=min_time, stop=max_time, step=time_stepsize)):
-        for i in range(len(xlabels) - len(numpy.arange(start=min_time, stop=max_time, step=time_stepsize))):
-            xlabels.pop()
+    # from the longest stretches down: a point is left out, if it lies inside a stretch drawn as one segment
+    merged = numpy.zeros(1, dtype=bool)
+    for mergeable in reversed(list_mergeable):
+        stride //= 2
+        merged = mergeable | numpy.repeat(merged, 2)[:len(mergeable)]
+        inner = numpy.arange(stride // 2, count - 1, stride)
+        keep[inner] = ~merged[inner // stride]
 
-    return min_time, max_time, time_stepsize, xlabels
+    return keep
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# split a line (one color per point, the color of the segment starting there) into pieces of one color, as vertex arrays
+# for a LineCollection (one path per piece instead of one per segment; every piece ends with the first point of the next
+# one, so the line stays connected); returns the pieces and their colors
+def Build_Pieces(xdata, ydata, list_pointColors):
+    points = numpy.column_stack([xdata, ydata])
+    starts = numpy.concatenate([[0], numpy.flatnonzero(numpy.any(list_pointColors[1:-1] != list_pointColors[:-2], axis=-1)) + 1])
+    ends = numpy.concatenate([starts[1:], [len(points) - 1]])
+
+    return [points[start:end + 1] for start, end in zip(starts, ends)], list_pointColors[starts]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# level of detail: points (rows x points, display coordinates [px]) that are needed to draw the lines of every row at this
+# resolution; of every run of consecutive points within the same pixel only the first and the last point are kept, with
+# envelope (x increasing, e.g. the time axis) the runs are pixel columns and their minimum and maximum point are kept too
+# returns a boolean mask of the kept points
+def Decimate_Pixels(x_px, y_px, envelope):
+    column = numpy.floor(x_px)
+    start = numpy.ones(x_px.shape, dtype=bool)
+    start[:, 1:] = column[:, 1:] != column[:, :-1]
+    if not envelope:
+        row = numpy.floor(y_px)
+        start[:, 1:] |= row[:, 1:] != row[:, :-1]
+    keep = start.copy()
+    keep[:, :-1] |= start[:, 1:]
+    keep[:, -1] = True
+
+    if envelope:
+        # first point of every run, that has the minimum (maximum) of the run
+        start, keep, y_px = start.ravel(), keep.ravel(), y_px.ravel()
+        run = numpy.cumsum(start) - 1
+        run_start = numpy.flatnonzero(start)
+        for run_extreme in (numpy.fmin.reduceat(y_px, run_start), numpy.fmax.reduceat(y_px, run_start)):
+            index = numpy.flatnonzero(y_px == run_extreme[run])
+            if len(index) == 0:
+                # no finite point at all
+                continue
+            keep[index[numpy.concatenate([[True], run[index[1:]] != run[index[:-1]]])]] = True
+        keep = keep.reshape(x_px.shape)
+
+    return keep
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# line collection of one line (one color per point), that only draws the points needed at the resolution it is drawn with
+# (Decimate_Pixels); the points are already reduced to the finest resolution needed (the export at PLOT_DPI) by the
+# caller and only these are kept, every change of the axes limits, the figure size or the dpi decimates them again
+class Decimated_LineCollection(LineCollection):
+    def __init__(self, xdata, ydata, list_pointColors, envelope, **kwargs):
+        self.points = numpy.column_stack([xdata, ydata])
+        self.list_pointColors = numpy.asarray(list_pointColors)
+        self.envelope = envelope
+        self.transform_key = None
+
+        # until the axes are known all points are drawn (keeps the data limits for autoscaling)
+        list_pieces, list_pieceColors = Build_Pieces(xdata, ydata, self.list_pointColors)
+        super().__init__(list_pieces, colors=list_pieceColors, **kwargs)
+
+    # decimate the points for the affine data -> display transform (3 x 3 matrix)
+    def Decimate(self, matrix):
+        display = self.points @ matrix[:2, :2].T + matrix[:2, 2]
+        keep = Decimate_Pixels(display[None, :, 0], display[None, :, 1], envelope=self.envelope)[0]
+        if numpy.count_nonzero(keep) < 2:
+            self.set_segments([])
+            return
+
+        list_pieces, list_pieceColors = Build_Pieces(self.points[keep, 0], self.points[keep, 1], self.list_pointColors[keep])
+        self.set_segments(list_pieces)
+        self.set_color(list_pieceColors)
+
+    def draw(self, renderer):
+        matrix = self.axes.transData.get_affine().get_matrix()
+        transform_key = tuple(matrix.ravel())
+        if transform_key != self.transform_key:
+            self.Decimate(matrix)
+            self.transform_key = transform_key
+        super().draw(renderer)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# draw the height of every satellite of the track as one line collection (decimated to the minimum and maximum per pixel
+# column); returns the ticks and labels of the time axis
+# for the (min, max) time range of everything plotted (HEIGHT_PLOT_TIME_STEPS ticks, labels in minutes since the start)
+@__PROFILING.Stage("draw_Height_Map")
+def draw_Height_Map(track, time_range, ax_Height):
+    # reduced to the first, last, minimum and maximum point per pixel column at PLOT_DPI (the time axis spread over the
+    # whole figure width, at least the calculation window), so the artists only keep what can be seen
+    time_span = max(time_range[1] - time_range[0], __INPUTS.TIME_END - __INPUTS.TIME_START)
+    px_per_day = __SETTINGS.PLOT_ONSCREEN_WIDTH * __SETTINGS.PLOT_DPI / time_span
+    keep = Decimate_Pixels(numpy.broadcast_to((track.times - time_range[0]) * px_per_day, track.height.shape), track.height, envelope=True)
+    list_pointColors = numpy.concatenate([track.colors, track.colors[:, -1:]], axis=1)
+
+    for satellite in range(len(track)):
+        times = track.times[keep[satellite]]
+        list_height = track.height[satellite, keep[satellite]]
+        list_colors = list_pointColors[satellite, keep[satellite]]
+        # satellites SGP4 cannot propagate over the window have no heights to draw
+        if numpy.count_nonzero(numpy.isfinite(list_height)) < 2:
+            continue
+        if __SETTINGS.PLOT_DECIMATION:
+            # minimum and maximum altitude per pixel column at the resolution it is drawn with
+            ax_Height.add_collection(Decimated_LineCollection(xdata=times, ydata=list_height, list_pointColors=list_colors, envelope=True, linewidths=1))
+        else:
+            list_pieces, list_pieceColors = Build_Pieces(times, list_height, list_colors)
+            ax_Height.add_collection(LineCollection(list_pieces, colors=list_pieceColors, linewidths=1))
+    ax_Height.autoscale_view()
+
+    min_time, max_time = time_range
+    list_ticks = numpy.linspace(min_time, max_time, __SETTINGS.HEIGHT_PLOT_TIME_STEPS, endpoint=False)
+    xlabels = [str(label) for label in numpy.round((list_ticks - min_time) * 24 * 60, 0)]
+
+    return list_ticks, xlabels
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # creates an arrow in the middle of the line to indicate its direction
+@__PROFILING.Stage("artists")
 def add_Arrow(line, xdata, ydata, subList_segColors):
     if len(xdata) != 0:
         size = __SETTINGS.PLOT_ARROW_SIZE
@@ -231,4 +911,122 @@ def add_Arrow(line, xdata, ydata, subList_segColors):
         else:
             end_ind = start_ind + 1
 
-        line.axes.annotate('', xytext=(xdata[start_ind], ydata[start_ind]), xy=(xdata[end_ind], ydata[end_ind]), arrowprops=dict(arrowstyle="->", color=subList_segColors[start_ind]), size=size)
+        line.axes.annotate('', xytext=(xdata[start_ind], ydata[start_ind]), xy=(xdata[end_ind], ydata[end_ind]), arrowprops=dict(arrowstyle="->", color=tuple(subList_segColors[start_ind])), size=size)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# check the time inputs, raises an error for an empty or invalid time window
+def Check_Time_Inputs():
+    if __INPUTS.TIME_END <= __INPUTS.TIME_START:
+        raise Exception(f"Check Time Inputs!")
+    if __INPUTS.TIME_INCREMENT > __INPUTS.TIME_END - __INPUTS.TIME_START:
+        raise Exception(f"Time Increment is too big!")
+    if __INPUTS.TIME_INCREMENT <= 0:
+        raise Exception(f"Time Increment is smaller than or equal to 0!")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# declare the plot and load a map image into the background
+# (uses a plain matplotlib figure, so it works with the gui canvas as well as without any display)
+def Create_Figure(img):
+    p = Figure(figsize=(__SETTINGS.PLOT_ONSCREEN_WIDTH, __SETTINGS.PLOT_ONSCREEN_HEIGHT))
+    ax_Map, ax_Height = p.subplots(2, gridspec_kw={'height_ratios': [2, 1]})
+    ax_Map.imshow(img, extent=[-180, 180, -90, 90])
+    Format_Axes(ax_Map=ax_Map, ax_Height=ax_Height)
+
+    return p, ax_Map, ax_Height
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# load the map image; with a width [px] it is downsampled to that width (on-screen resolution) and kept decoded in the
+# on-disk cache, so later starts do not decode the full image at all; without a width the full image is loaded (export)
+def Load_Map(width=None):
+    if width is None:
+        return matplotlib.image.imread(__SETTINGS.PATH_MAP)
+
+    if __SETTINGS.CACHE_ENABLED:
+        return __CACHE.Load_or_Decode(name=__CACHE.Get_Map_Key(__SETTINGS.PATH_MAP, width), decode=lambda: Decode_Map(width))
+
+    return Decode_Map(width)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# decode the map image downsampled to the given width [px] (jpeg images are decoded at a reduced scale right away)
+def Decode_Map(width):
+    with PIL.Image.open(__SETTINGS.PATH_MAP) as image:
+        width = min(width, image.width)
+        height = round(image.height * width / image.width)
+        image.draft("RGB", (width, height))
+        return numpy.asarray(image.convert("RGB").resize((width, height), PIL.Image.LANCZOS))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# remove all plotted data, but keep the map image (so it does not have to be drawn with imshow again)
+def Clear_Axes(ax_Map, ax_Height):
+    # images[0] is the map image, later images are coverage maps
+    for artist in ax_Map.collections + ax_Map.lines + ax_Map.texts + ax_Map.patches + ax_Map.images[1:]:
+        artist.remove()
+    ax_Height.cla()
+    Format_Axes(ax_Map=ax_Map, ax_Height=ax_Height)
+    ax_Height.set_title(label="")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# save the figure at PLOT_DPI; the on-screen map image is replaced by the full resolution image for the export
+def Export_Figure(p, ax_Map, exportpath, img_full):
+    map_image = ax_Map.images[0]
+    img_screen = map_image.get_array()
+    map_image.set_data(img_full)
+    try:
+        p.savefig(exportpath, dpi=__SETTINGS.PLOT_DPI)
+    finally:
+        map_image.set_data(img_screen)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# set ticks and labels of the map and the height plot
+def Format_Axes(ax_Map, ax_Height):
+    ax_Map.set(xticks=numpy.arange(start=-180, stop=181, step=30), yticks=numpy.arange(start=-90, stop=91, step=15), xlabel="longitude [deg]", ylabel="latitude [deg]")
+    ax_Height.set(xlabel="time [min]", ylabel="altitude [km]")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# draw the ground tracks and the height data of all satellites of a track; time_range is the (min, max) time range of
+# everything plotted so far (including this track), used for the time axis
+def Draw_Tracks(ax_Map, ax_Height, track, time_range, draw_arrows):
+    # split up the position data and draw the data onto the map
+    for list_lat, list_lon, list_segColors in zip(track.lat, track.lon, track.colors):
+        Split_and_Draw(list_lat=list_lat, list_lon=list_lon, ax=ax_Map, list_segColors=list_segColors, draw_arrows=draw_arrows)
+    # format and plot height data
+    list_ticks, xlabels = draw_Height_Map(track=track, time_range=time_range, ax_Height=ax_Height)
+    Format_Axes(ax_Map=ax_Map, ax_Height=ax_Height)
+    ax_Height.set(xticks=list_ticks, xticklabels=xlabels)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# stand-in for matplotlib axes, that records all calls made on it and replays them on the real axes later
+# (lets a worker thread build all artists, while only adding them to the figure happens in the gui thread)
+class Deferred_Axes:
+    def __init__(self):
+        self.list_calls = []
+        self.axes = self        # add_Arrow uses ax.axes
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.list_calls.append((name, args, kwargs))
+        return record
+
+    def Replay(self, ax):
+        for name, args, kwargs in self.list_calls:
+            getattr(ax, name)(*args, **kwargs)
+        self.list_calls.clear()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# write one block of a ground track (as yielded by GenerateGeodetics_Chunks) to an open csv file (time [jd], satellite,
+# lat, lon, height); skip_first leaves out the first point in time, which is already part of the previous block
+def Write_Chunk_CSV(csv_file, track, skip_first):
+    first = 1 if skip_first else 0
+    for satellite in range(len(track)):
+        rows = numpy.column_stack([track.times[first:], numpy.full(len(track.times) - first, satellite), track.lat[satellite, first:], track.lon[satellite, first:], track.height[satellite, first:]])
+        numpy.savetxt(csv_file, rows, delimiter=",", fmt=["%.8f", "%d", "%.6f", "%.6f", "%.4f"])
@@ -29,6 +29,11 @@ gui_setup = [
         sg.Text("TLE, Line 2:", size=(10, 1)),
         sg.In(enable_events=True, key="TLE-LINE2", size=(65,1)),
     ],
+    [
+        sg.Text("TLE Catalog:", size=(10, 1)),
+        sg.In(enable_events=True, key="CATALOG-PATH", size=(55, 1)),
+        sg.FileBrowse(button_text="Browse", target="CATALOG-PATH", file_types=(("TLE Catalog", "*.txt *.tle *.3le"), ("All Files", "*.*"))),
+    ],
     # TIME
     [
         sg.Text("Time (Start):", size=(10, 1)),
@@ -68,7 +73,26 @@ gui_setup = [
         sg.Button(button_text="Save Image", size=(10, 1), enable_events=True, key="BTN-SAVE"),
     ],
     [
-        sg.Text(size=(80, 15), key="SETUP-DATA-OUT"),
+        sg.CBox(enable_events=True, text="adaptive sampling", key="CHECK-ADAPTIVE", size=(25,1)),
+        sg.Button(button_text="Cancel", size=(15, 1), enable_events=True, key="BTN-CANCEL", disabled=True),
+    ],
+    [
+        sg.CBox(enable_events=True, text="screen close approaches", key="CHECK-CONJUNCTIONS", size=(25,1)),
+    ],
+    [
+        sg.CBox(enable_events=True, text="coverage map", key="CHECK-COVERAGE", size=(25,1)),
+        sg.Button(button_text="Save Coverage", size=(15, 1), enable_events=True, key="BTN-SAVE-COVERAGE", disabled=True),
+    ],
+    # ground stations: one per line "name, lat, lon, height [m]", their passes are predicted with every plot
+    [
+        sg.Text("Stations:", size=(10, 1)),
+        sg.Multiline(key="STATIONS", size=(63, 3), tooltip="one ground station per line: name, lat [deg], lon [deg], height [m]"),
+    ],
+    [
+        sg.Text(size=(80, 12), key="SETUP-DATA-OUT"),
+    ],
+    [
+        sg.Multiline(size=(80, 8), key="EVENTS-OUT", disabled=True, font=("Courier", 8)),
     ],
 ]
 
@@ -93,3 +117,43 @@ def draw_figure(canvas, figure):
     figure_canvas_agg.get_tk_widget().pack(side="top", fill="both", expand=0)
     figure_canvas_agg.get_tk_widget().place()
     return figure_canvas_agg
+
+
+# redraws the figure on the gui canvas: the last rendering (map, earlier tracks) is kept and only the newly added artists
+# are drawn on top of it and blitted (so they also cover the axes frame and earlier arrows by a pixel at most); the whole
+# figure is only rendered again, when something else changed (axes limits, ticks, labels, titles, canvas size) or
+# artists were removed
+class BlitManager:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.figure = canvas.figure
+        self.background = None
+        self.layout = None
+        self.set_drawn = set()      # artists contained in the background
+
+    # everything that changes the figure apart from added artists
+    def Layout(self):
+        layout = [self.canvas.get_width_height(), self.figure.get_suptitle()]
+        for ax in self.figure.axes:
+            layout += [ax.get_xlim(), ax.get_ylim(), tuple(ax.get_xticks()), tuple(ax.get_yticks()), tuple(label.get_text() for label in ax.get_xticklabels()), ax.get_title(), ax.get_xlabel(), ax.get_ylabel()]
+        return layout
+
+    # render the whole figure on the next Draw (e.g. after an export has used the canvas with another resolution)
+    def Invalidate(self):
+        self.background = None
+
+    def Draw(self):
+        list_artists = [artist for ax in self.figure.axes for artist in ax.get_children()]
+        layout = self.Layout()
+
+        if self.background is None or layout != self.layout or not self.set_drawn.issubset(list_artists):
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            for artist in sorted((artist for artist in list_artists if artist not in self.set_drawn), key=lambda artist: artist.get_zorder()):
+                self.figure.draw_artist(artist)
+            self.canvas.blit(self.figure.bbox)
+
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.layout = layout
+        self.set_drawn = set(list_artists)
@@ -0,0 +1,163 @@
+# HEADLESS
+# render ground track images without the gui (e.g. on render servers without a display)
+#
+# example:
+#   python headless.py --catalog catalog.tle --window 2024-01-01T00:00 2024-01-02T00:00 --increment 1 --colors --out-dir images
+
+# library imports
+import argparse
+import os
+import sys
+import re
+import concurrent.futures
+
+import matplotlib
+matplotlib.use("Agg")       # no display needed, has to be set before any figure is created
+import matplotlib.image
+import matplotlib.colors
+
+# import of own functions and variables
+import inputs as __INPUTS
+import functions as __FUNCTIONS
+import settings as __SETTINGS
+
+# map image, only decoded once per worker process
+img = None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# render one image (one or more satellites over one time window), the same way the gui does on "Save Image"
+def Render_Image(job):
+    global img
+    if img is None:
+        img = matplotlib.image.imread(__SETTINGS.PATH_MAP)
+
+    # every worker process has its own copy of the input variables
+    __INPUTS.TLE_CATALOG = job["catalog"] if len(job["catalog"]) > 1 else []
+    __INPUTS.TLE[0] = job["catalog"][0][1]
+    __INPUTS.TLE[1] = job["catalog"][0][2]
+    __INPUTS.TIME_START = job["time_start"]
+    __INPUTS.TIME_END = job["time_end"]
+    __INPUTS.TIME_INCREMENT = job["time_increment"]
+    __INPUTS.ADAPTIVE_SAMPLING = job["adaptive"]
+    __INPUTS.PLOT_COLOR = job["plot_color"]
+    __SETTINGS.TRANSFORM_BACKEND = job["transform_backend"]
+    __FUNCTIONS.Check_Time_Inputs()
+    __FUNCTIONS.Reset_Transform_Deviation()
+
+    if __FUNCTIONS.Use_Streaming():
+        list_chunks = __FUNCTIONS.GenerateGeodetics_Chunks(check_colors=job["check_colors"])
+    else:
+        list_chunks = [__FUNCTIONS.GenerateGeodetics(check_colors=job["check_colors"])]
+
+    p, ax_Map, ax_Height = __FUNCTIONS.Create_Figure(img)
+    time_range = None
+    # the samples can be written to a csv file (file sink) block by block as well
+    csv_file = open(os.path.splitext(job["exportpath"])[0] + ".csv", "w") if job["csv"] else None
+    try:
+        if csv_file is not None:
+            csv_file.write("time_jd,satellite,lat_deg,lon_deg,height_km\n")
+        for chunk_index, track in enumerate(list_chunks):
+            time_range = track.Time_Range(time_range)
+            __FUNCTIONS.Draw_Tracks(ax_Map=ax_Map, ax_Height=ax_Height, track=track, time_range=time_range, draw_arrows=job["draw_arrows"])
+            if csv_file is not None:
+                __FUNCTIONS.Write_Chunk_CSV(csv_file, track=track, skip_first=chunk_index > 0)
+            # the artists only keep the reduced tracks, the block itself is not needed anymore
+            del track
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+
+    if job["transform_backend"] == "compare":
+        # maximum over all blocks (and refinement rounds of the adaptive sampling)
+        print(f"{job['exportpath']}: " + __FUNCTIONS.Format_Transform_Deviation().replace("\n", " "))
+
+    p.suptitle(job["title"])
+    p.savefig(job["exportpath"], dpi=__SETTINGS.PLOT_DPI)
+
+    return job["exportpath"]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# render all jobs in parallel, one job per process (workers = None uses all cores); returns the number of failed jobs
+def Render_Batch(list_jobs, workers=None):
+    failed_count = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(Render_Image, job): job for job in list_jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                print(f"saved {future.result()}")
+            except Exception as exc:
+                print(f"failed {futures[future]['exportpath']}: {exc}")
+                failed_count += 1
+
+    return failed_count
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# build the list of render jobs: every satellite (or the whole catalog, if combined) for every time window
+def Build_Jobs(args):
+    list_catalog: list[(str, str, str)] = []
+    for line1, line2 in args.tle:
+        list_catalog.append((line1[2:7].strip(), line1, line2))
+    if args.catalog is not None:
+        list_catalog += __FUNCTIONS.Load_TLE_Catalog(args.catalog)
+    if len(list_catalog) == 0:
+        raise Exception("No TLE given, use --tle or --catalog!")
+
+    list_groups = [list_catalog] if args.combine else [[entry] for entry in list_catalog]
+
+    plot_color = matplotlib.colors.to_rgb(args.color)
+    time_increment = args.increment / (24 * 60)
+
+    list_jobs = []
+    for window_index, (time_start, time_end) in enumerate(args.window):
+        for group in list_groups:
+            name = "catalog" if args.combine else group[0][0]
+            filename = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{name}_{window_index}") + ".png"
+            list_jobs.append({
+                "catalog": group,
+                "time_start": __FUNCTIONS.ISO_to_JD(time_start),
+                "time_end": __FUNCTIONS.ISO_to_JD(time_end),
+                "time_increment": time_increment,
+                "adaptive": args.adaptive,
+                "csv": args.csv,
+                "check_colors": args.colors,
+                "draw_arrows": args.arrows,
+                "plot_color": plot_color,
+                "transform_backend": args.transform,
+                "title": args.title if args.title is not None else name,
+                "exportpath": os.path.join(args.out_dir, filename),
+            })
+
+    return list_jobs
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# command line interface
+def Parse_Arguments(argv=None):
+    parser = argparse.ArgumentParser(description="SAROMAN - render satellite ground tracks without the gui")
+    parser.add_argument("--tle", nargs=2, action="append", default=[], metavar=("LINE1", "LINE2"), help="both lines of a TLE, may be given multiple times")
+    parser.add_argument("--catalog", help="TLE catalog file (two line or three line format)")
+    parser.add_argument("--combine", action="store_true", help="draw all satellites into one image instead of one image per satellite")
+    parser.add_argument("--window", nargs=2, action="append", required=True, metavar=("START", "END"), help="time window in ISO format (e.g. 2024-01-01T00:00), may be given multiple times")
+    parser.add_argument("--increment", type=float, required=True, help="time increment in minutes")
+    parser.add_argument("--adaptive", action="store_true", help="adaptive sampling, the increment is the finest time step used")
+    parser.add_argument("--colors", action="store_true", help="plot velocity as line color")
+    parser.add_argument("--arrows", action="store_true", help="plot flight direction")
+    parser.add_argument("--color", default="#000000", help="line color, if the velocity is not plotted as line color")
+    parser.add_argument("--transform", choices=["astropy", "numpy", "compare"], default=__SETTINGS.TRANSFORM_BACKEND, help="TEME -> geodetic transform backend; compare uses astropy and reports the deviation of numpy")
+    parser.add_argument("--csv", action="store_true", help="additionally write all samples (time, satellite, lat, lon, height) to a csv file next to the image")
+    parser.add_argument("--title", help="diagram title (default: satellite name)")
+    parser.add_argument("--out-dir", default=".", help="directory the images are saved to")
+    parser.add_argument("--workers", type=int, help="number of parallel processes (default: all cores)")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = Parse_Arguments()
+    os.makedirs(arguments.out_dir, exist_ok=True)
+    # a non-zero exit code, if any image failed (e.g. for scheduled batches)
+    if Render_Batch(Build_Jobs(arguments), workers=arguments.workers) != 0:
+        sys.exit(1)
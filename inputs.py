@@ -3,9 +3,11 @@
 # to be manipulated by the gui (user)
 
 TLE = [str, str]              # both lines of the TLE, separated by ","
+TLE_CATALOG: list[(str, str, str)] = []     # all TLEs of a loaded catalog file as (name, line 1, line 2)
 
 TIME_START: float             # start time for calculation, in jd-format
 TIME_END: float               # end time for calculation, in jd-format
 TIME_INCREMENT: float         # time increment for calculation, in jd-format
+ADAPTIVE_SAMPLING: bool = False     # only use the points of the time grid, that are needed to draw the track accurately
 
-PLOT_COLOR: (float, float, float) = (0, 0, 0)
\ No newline at end of file
+PLOT_COLOR: (float, float, float) = (0, 0, 0)
@@ -1,36 +1,134 @@
 # main.py
 
 # library imports
-import numpy
-import matplotlib.pyplot as plt
+import threading
+import matplotlib
 import PySimpleGUI as sg
-from astropy.time import Time as aTime
 from tkinter.filedialog import asksaveasfilename as SaveFileDialog
 from tkinter.colorchooser import askcolor as ColorChooser
 
 # import of own functions and variables
 import inputs as __INPUTS
 import functions as __FUNCTIONS
+import passes as __PASSES
+import conjunctions as __CONJUNCTIONS
+import coverage as __COVERAGE
 import gui_setup as __GUI
 import settings as __SETTINGS
+import profiling as __PROFILING
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # INIT
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 # declare the plot and load a map image into the background
-img = plt.imread(__SETTINGS.PATH_MAP)
-p, (ax_Map, ax_Height) = plt.subplots(2, figsize=(__SETTINGS.PLOT_ONSCREEN_WIDTH, __SETTINGS.PLOT_ONSCREEN_HEIGHT), gridspec_kw={'height_ratios': [2, 1]})
-ax_Map.imshow(img, extent=[-180, 180, -90, 90])
-plt.setp(ax_Map, xticks=numpy.arange(start=-180, stop=181, step=30), yticks=numpy.arange(start=-90, stop=91, step=15), xlabel="longitude [deg]", ylabel="latitude [deg]")
-plt.setp(ax_Height, xlabel="time [min]", ylabel="altitude [km]")
+# (downsampled to the on-screen resolution; the full resolution image is only loaded for the first export)
+img = __FUNCTIONS.Load_Map(width=round(__SETTINGS.PLOT_ONSCREEN_WIDTH * matplotlib.rcParams["figure.dpi"]))
+img_full = None
+p, ax_Map, ax_Height = __FUNCTIONS.Create_Figure(img)
 
 # gui
 window = sg.Window("SAROMAN", __GUI.gui_layout, finalize=True)
 gui_plot = __GUI.draw_figure(window["PLOT-OUT"].TKCanvas, p)
+# later redraws only draw the new tracks onto the last rendering, if possible
+gui_blit = __GUI.BlitManager(gui_plot)
 
-# save all the time stamps
-complete_time_list: list[float] = []
+# import sgp4 and astropy in the background, while the window is already usable
+threading.Thread(target=__FUNCTIONS.Warm_Up, daemon=True).start()
+
+# (min, max) time range of everything plotted, for the time axis of the height plot (None: nothing plotted)
+time_range = None
+
+# coverage arrays of the last plot with "coverage map" (None: no coverage calculated), for "Save Coverage"
+coverage = None
+
+# background worker: cancel flag and the setup info shown with the progress
+worker_cancel = threading.Event()
+setup_info_string = ""
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# WORKER
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# calculate the satellite data and build all artists in a background thread; the artists are recorded on deferred axes
+# and only added to the figure by the gui thread (WORKER-DONE), progress is reported with WORKER-PROGRESS
+def Plot_Worker(check_colors, draw_arrows, old_time_range, list_stations, check_conjunctions, check_coverage):
+    try:
+        # the calculation runs in this thread, so it is profiled here (see profiling.Profile)
+        with __PROFILING.Profile(), __PROFILING.Measure("plot: calculate and build artists"):
+            deferred_Map = __FUNCTIONS.Deferred_Axes()
+            deferred_Height = __FUNCTIONS.Deferred_Axes()
+            new_time_range = old_time_range
+            info_string = ""
+            __FUNCTIONS.Reset_Transform_Deviation()
+
+            window.write_event_value("WORKER-PROGRESS", "calculating ...")
+            # generate satellite position data; additionally generates a list of colors for the plot
+            # (one row per satellite, a single TLE is handled as a catalog with one satellite)
+            if __FUNCTIONS.Use_Streaming():
+                # long calculation windows are calculated block by block while drawing, to keep the memory bounded
+                list_chunks = __FUNCTIONS.GenerateGeodetics_Chunks(check_colors=check_colors, cancel=worker_cancel)
+                chunk_count = -(-__FUNCTIONS.Get_Sample_Count() // __FUNCTIONS.Get_Chunk_Length())
+            else:
+                list_chunks = [__FUNCTIONS.GenerateGeodetics(check_colors=check_colors, cancel=worker_cancel)]
+                chunk_count = 1
+
+            # split up the position data and draw the data onto the map; format and plot height data (satellite by satellite)
+            for chunk_index, track in enumerate(list_chunks):
+                new_time_range = track.Time_Range(new_time_range)
+                for satellite in range(len(track)):
+                    __FUNCTIONS.Check_Cancel(worker_cancel)
+                    __FUNCTIONS.Draw_Tracks(ax_Map=deferred_Map, ax_Height=deferred_Height, track=track.Row(satellite), time_range=new_time_range, draw_arrows=draw_arrows)
+                    window.write_event_value("WORKER-PROGRESS", f"block {chunk_index + 1}/{chunk_count}, satellite {satellite + 1}/{len(track)}")
+                # the artists only keep the reduced tracks, the block itself is not needed anymore
+                del track
+
+            # report the accuracy of the numpy transform backend (maximum over all blocks)
+            deviation_string = __FUNCTIONS.Format_Transform_Deviation()
+            if deviation_string != "":
+                info_string += "\n\n" + deviation_string
+
+            # passes of all satellites over the ground stations and close approaches between the satellites
+            list_events_strings = []
+            if len(list_stations) != 0:
+                window.write_event_value("WORKER-PROGRESS", "predicting passes ...")
+                list_passes = __PASSES.Predict_Passes(list_stations, cancel=worker_cancel)
+                __PASSES.Draw_Passes(ax_Map=deferred_Map, list_passes=list_passes, list_stations=list_stations)
+                list_events_strings.append(__PASSES.Format_Passes(list_passes))
+                info_string += f"\n\nPasses: {len(list_passes)}"
+            if check_conjunctions:
+                window.write_event_value("WORKER-PROGRESS", "screening close approaches ...")
+                list_conjunctions = __CONJUNCTIONS.Screen_Conjunctions(cancel=worker_cancel)
+                __CONJUNCTIONS.Draw_Conjunctions(ax_Map=deferred_Map, list_conjunctions=list_conjunctions)
+                list_events_strings.append(__CONJUNCTIONS.Format_Conjunctions(list_conjunctions))
+                info_string += f"\n\nClose approaches (< {__SETTINGS.CONJUNCTION_DISTANCE} km): {len(list_conjunctions)}"
+            events_string = "\n\n".join(list_events_strings)
+
+            # coverage and revisit map of all satellites
+            new_coverage = None
+            if check_coverage:
+                window.write_event_value("WORKER-PROGRESS", "calculating coverage ...")
+                new_coverage = __COVERAGE.Calc_Coverage(cancel=worker_cancel)
+                __COVERAGE.Draw_Coverage(ax_Map=deferred_Map, coverage=new_coverage)
+                info_string += f"\n\nCoverage: max. {new_coverage['visits'].max()} visits per {__SETTINGS.COVERAGE_RESOLUTION} deg cell, {(new_coverage['visits'] > 0).mean() * 100:.1f} % of the cells seen"
+
+        # only after the profiler is disabled in this thread, the gui thread may enable it
+        window.write_event_value("WORKER-DONE", (deferred_Map, deferred_Height, new_time_range, info_string, events_string, new_coverage))
+    except __FUNCTIONS.Cancelled:
+        # the cancel flag is checked between the blocks of every calculation
+        window.write_event_value("WORKER-CANCELLED", None)
+    except Exception as exc:
+        window.write_event_value("WORKER-ERROR", exc)
+
+
+# enable or disable the buttons, that must not be used while the worker is running
+# (saving would also start a new profiling run, while the worker still records into the run of the plot)
+def Set_Worker_Running(running):
+    window["BTN-PLOT"].update(disabled=running)
+    window["BTN-CLEAR"].update(disabled=running)
+    window["BTN-SAVE"].update(disabled=running)
+    window["BTN-CANCEL"].update(disabled=not running)
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -43,83 +141,138 @@ while True:
         break
 
     elif gui_event == "BTN-PLOT":
+        __PROFILING.Start_Run()
         try:
             # generate input data
             __INPUTS.TLE[0] = gui_values["TLE-LINE1"]
             __INPUTS.TLE[1] = gui_values["TLE-LINE2"]
+            # a catalog file replaces the single TLE and plots all of its satellites at once
+            catalog_path = gui_values["CATALOG-PATH"]
+            if catalog_path != "":
+                __INPUTS.TLE_CATALOG = __FUNCTIONS.Load_TLE_Catalog(catalog_path)
+            else:
+                __INPUTS.TLE_CATALOG = []
 
             time_start = gui_values["DATE-START-OUT"] + "T" + gui_values["TIME-START-HR"] + ":" + gui_values["TIME-START-MIN"] + ":00"
             time_end = gui_values["DATE-END-OUT"] + "T" + gui_values["TIME-END-HR"] + ":" + gui_values["TIME-END-MIN"] + ":00"
             time_increment = 1/24 * float(gui_values["TIME-INCR-HR"]) + 1/(24 * 60) * float(gui_values["TIME-INCR-MIN"])
 
-            __INPUTS.TIME_START = aTime(time_start).to_value('jd', 'float')
-            __INPUTS.TIME_END = aTime(time_end).to_value('jd', 'float')
+            __INPUTS.TIME_START = __FUNCTIONS.ISO_to_JD(time_start)
+            __INPUTS.TIME_END = __FUNCTIONS.ISO_to_JD(time_end)
             __INPUTS.TIME_INCREMENT = time_increment
+            __INPUTS.ADAPTIVE_SAMPLING = gui_values["CHECK-ADAPTIVE"]
+            list_stations = __PASSES.Parse_Stations(gui_values["STATIONS"])
 
             # check time inputs
-            if __INPUTS.TIME_END <= __INPUTS.TIME_START:
-                raise Exception(f"Check Time Inputs!")
-            if __INPUTS.TIME_INCREMENT > __INPUTS.TIME_END - __INPUTS.TIME_START:
-                raise Exception(f"Time Increment is too big!")
-            if __INPUTS.TIME_INCREMENT <= 0:
-                raise Exception(f"Time Increment is smaller than or equal to 0!")
+            with __PROFILING.Measure("plot: check inputs"):
+                __FUNCTIONS.Check_Time_Inputs()
 
             # output the input data
-            setup_info_string = f"SETUP INFO:\n\nTLE,L1: {__INPUTS.TLE[0]}\nTLE,L2: {__INPUTS.TLE[1]}\n\nStart Time: {time_start}\nEnd Time: {time_end}\nTime Increment: {time_increment} days"
+            if catalog_path != "":
+                setup_info_string = f"SETUP INFO:\n\nTLE Catalog: {catalog_path}\nSatellites: {len(__INPUTS.TLE_CATALOG)}\n\nStart Time: {time_start}\nEnd Time: {time_end}\nTime Increment: {time_increment} days"
+            else:
+                setup_info_string = f"SETUP INFO:\n\nTLE,L1: {__INPUTS.TLE[0]}\nTLE,L2: {__INPUTS.TLE[1]}\n\nStart Time: {time_start}\nEnd Time: {time_end}\nTime Increment: {time_increment} days"
+            if __INPUTS.ADAPTIVE_SAMPLING:
+                setup_info_string += " (adaptive)"
+            if len(list_stations) != 0:
+                setup_info_string += f"\nGround Stations: {', '.join(station[0] for station in list_stations)}"
             window["SETUP-DATA-OUT"].update(setup_info_string)
         except Exception as exc:
             # catch errors
             sg.popup_error(f"There seems to be an error with your input data: \n{exc}")
             continue    # jump to the next while-loop iteration
 
-        try:
-            # draw with color gradient (t) or with user selected color (f)
-            check_colors = gui_values["CHECK-COLORS"]
-            # generate satellite position data; additionally generates a list of colors for the plot
-            list_lat, list_lon, list_segColors, list_height, list_times = __FUNCTIONS.GenerateGeodetics(check_colors=check_colors)
+        # draw with color gradient (t) or with user selected color (f)
+        check_colors = gui_values["CHECK-COLORS"]
+        draw_arrows = gui_values["CHECK-ARROW"]
+        check_conjunctions = gui_values["CHECK-CONJUNCTIONS"]
+        check_coverage = gui_values["CHECK-COVERAGE"]
+        # calculate and build the plot in the background, the gui stays usable meanwhile
+        worker_cancel.clear()
+        Set_Worker_Running(True)
+        threading.Thread(target=Plot_Worker, args=(check_colors, draw_arrows, time_range, list_stations, check_conjunctions, check_coverage), daemon=True).start()
 
-            for time in list_times:
-                complete_time_list.append(time)
-        except Exception as exc:
-            # catch errors
-            sg.popup_error(f"An error occured while calculating: \n{exc}")
-            continue
+    elif gui_event == "BTN-CANCEL":
+        worker_cancel.set()
+
+    elif gui_event == "WORKER-PROGRESS":
+        window["SETUP-DATA-OUT"].update(setup_info_string + "\n\n" + gui_values[gui_event])
 
+    elif gui_event == "WORKER-DONE":
+        deferred_Map, deferred_Height, new_time_range, info_string, events_string, new_coverage = gui_values[gui_event]
         try:
-            # split up the position data and draw the data onto the map
-            draw_arrows = gui_values["CHECK-ARROW"]
-            __FUNCTIONS.Split_and_Draw(list_lat=list_lat, list_lon=list_lon, ax=ax_Map, list_segColors=list_segColors, draw_arrows=draw_arrows)
-            plt.setp(ax_Map, xticks=numpy.arange(start=-180, stop=181, step=30), yticks=numpy.arange(start=-90, stop=91, step=15), xlabel="longitude [deg]", ylabel="latitude [deg]")
-            # format and plot height data
-            min_time, max_time, time_stepsize, xlabels = __FUNCTIONS.draw_Height_Map(list_height=list_height, list_times=list_times, list_segColors=list_segColors, ax_Height=ax_Height, complete_time_list=complete_time_list)
-            plt.setp(ax_Height, xticks=numpy.arange(start=min_time, stop=max_time, step=time_stepsize), xticklabels=xlabels, xlabel="time [min]", ylabel="altitude [km]")
-            # draw plot to gui element
-            plot_title = gui_values["TITLE"]
-            plt.suptitle(plot_title)
-            gui_plot.draw()
+            # add the artists built by the worker to the figure and draw plot to gui element
+            with __PROFILING.Profile():
+                with __PROFILING.Measure("plot: add artists"):
+                    deferred_Map.Replay(ax_Map)
+                    deferred_Height.Replay(ax_Height)
+                time_range = new_time_range
+                plot_title = gui_values["TITLE"]
+                p.suptitle(plot_title)
+                # the coverage map lies below the tracks, so it cannot be blitted on top of the last rendering
+                if new_coverage is not None:
+                    coverage = new_coverage
+                    window["BTN-SAVE-COVERAGE"].update(disabled=False)
+                    gui_blit.Invalidate()
+                with __PROFILING.Measure("plot: redraw"):
+                    gui_blit.Draw()
+            __PROFILING.Write_Run("plot")
+            window["SETUP-DATA-OUT"].update(setup_info_string + info_string + __PROFILING.Summary())
+            window["EVENTS-OUT"].update(events_string)
         except Exception as exc:
             # catch errors
             sg.popup_error(f"An error occured while graphing: \n{exc}")
-            continue
+        Set_Worker_Running(False)
+
+    elif gui_event == "WORKER-CANCELLED":
+        window["SETUP-DATA-OUT"].update(setup_info_string + "\n\ncancelled")
+        Set_Worker_Running(False)
+
+    elif gui_event == "WORKER-ERROR":
+        # catch errors
+        sg.popup_error(f"An error occured while calculating: \n{gui_values[gui_event]}")
+        window["SETUP-DATA-OUT"].update(setup_info_string)
+        Set_Worker_Running(False)
 
     elif gui_event == "BTN-CLEAR":
         # reset the graph
-        ax_Map.cla()
-        ax_Height.cla()
-        ax_Map.imshow(img, extent=[-180, 180, -90, 90])
-        plt.setp(ax_Map, xticks=numpy.arange(start=-180, stop=181, step=30), yticks=numpy.arange(start=-90, stop=91, step=15), xlabel="longitude [deg]", ylabel="latitude [deg]")
-        plt.setp(ax_Height, xlabel="time [min]", ylabel="altitude [km]")
-        plt.title(label="")
-        gui_plot.draw()
-        # reset complete time list
-        complete_time_list.clear()
+        __PROFILING.Start_Run()
+        with __PROFILING.Profile(), __PROFILING.Measure("clear"):
+            __FUNCTIONS.Clear_Axes(ax_Map=ax_Map, ax_Height=ax_Height)
+            with __PROFILING.Measure("clear: redraw"):
+                gui_blit.Draw()
+        # reset the time range, the list of passes and close approaches and the coverage
+        time_range = None
+        window["EVENTS-OUT"].update("")
+        coverage = None
+        window["BTN-SAVE-COVERAGE"].update(disabled=True)
+        if __SETTINGS.PROFILING_ENABLED:
+            __PROFILING.Write_Run("clear")
+            window["SETUP-DATA-OUT"].update(setup_info_string + __PROFILING.Summary())
 
     elif gui_event == "BTN-SAVE":
         # export the final image and show it on screen
         default_filename = gui_values["TITLE"]
         exportpath = SaveFileDialog(filetypes=[("Image", "*.png")], defaultextension="*.png", initialfile=default_filename)
         if exportpath != "":
-            plt.savefig(exportpath, dpi=__SETTINGS.PLOT_DPI)
+            __PROFILING.Start_Run()
+            with __PROFILING.Profile():
+                if img_full is None:
+                    with __PROFILING.Measure("save: load map"):
+                        img_full = __FUNCTIONS.Load_Map()
+                with __PROFILING.Measure("save: savefig"):
+                    __FUNCTIONS.Export_Figure(p, ax_Map=ax_Map, exportpath=exportpath, img_full=img_full)
+            gui_blit.Invalidate()
+            if __SETTINGS.PROFILING_ENABLED:
+                __PROFILING.Write_Run("save")
+                window["SETUP-DATA-OUT"].update(setup_info_string + __PROFILING.Summary())
+
+    elif gui_event == "BTN-SAVE-COVERAGE":
+        # export the coverage arrays (visits, time in view, mean revisit time, cell centres)
+        default_filename = gui_values["TITLE"] + "_coverage"
+        exportpath = SaveFileDialog(filetypes=[("Numpy archive", "*.npz")], defaultextension="*.npz", initialfile=default_filename)
+        if exportpath != "" and coverage is not None:
+            __COVERAGE.Export_Coverage(coverage, exportpath=exportpath)
 
     elif gui_event == "BTN-COLOR":
         # open color chooser and write to input variables
@@ -0,0 +1,288 @@
+# PASSES
+# pass prediction for ground stations: rise, culmination and set times of all satellites over all stations
+# 1. coarse scan: all satellites are propagated together on a coarse time grid (PASS_SCAN_STEP), the elevation over every
+#    station is calculated as one array; rises and sets are found as sign changes of elevation - PASS_MIN_ELEVATION
+# 2. passes shorter than the scan step (no sign change) can only hide around a local maximum of the elevation; these are
+#    only searched, if the satellite can have come close enough to the station (bound by its maximum angular speed)
+# 3. every rise and set is refined as root of the elevation (newton steps with the elevation rate), every culmination as
+#    root of the elevation rate (secant steps), both safeguarded by bisection and vectorized over all passes (Find_Roots)
+# the satellite positions are rotated to ITRS with the numpy transform (fast, ~1e-4 deg from astropy)
+
+# library imports
+import numpy
+from matplotlib.collections import LineCollection
+
+# import of own functions and variables
+import settings as __SETTINGS
+import inputs as __INPUTS
+import functions as __FUNCTIONS
+import profiling as __PROFILING
+
+EARTH_ROTATION = 7.2921159e-5       # rad/s
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# read the ground stations from a text, one station per line: name, latitude [deg], longitude [deg], height [m] (optional)
+def Parse_Stations(text):
+    list_stations: list[(str, float, float, float)] = []
+    for line in text.splitlines():
+        if line.strip() == "":
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) not in (3, 4):
+            raise Exception(f"Invalid ground station: {line} (name, lat, lon, height [m])")
+        height = float(fields[3]) / 1000 if len(fields) == 4 else 0.0
+        list_stations.append((fields[0], float(fields[1]), float(fields[2]), height))
+
+    return list_stations
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ITRS position [km] of the stations on the WGS84 ellipsoid and their local frames (rows: east, north, up)
+def Calc_Station_Frames(list_stations):
+    a = 6378.137
+    f = 1 / 298.257223563
+    e2 = f * (2 - f)
+
+    lat = numpy.deg2rad([station[1] for station in list_stations])
+    lon = numpy.deg2rad([station[2] for station in list_stations])
+    height = numpy.array([station[3] for station in list_stations])
+    N = a / numpy.sqrt(1 - e2 * numpy.sin(lat) ** 2)
+
+    station_position = numpy.stack([(N + height) * numpy.cos(lat) * numpy.cos(lon), (N + height) * numpy.cos(lat) * numpy.sin(lon), (N * (1 - e2) + height) * numpy.sin(lat)], axis=-1)
+    east = numpy.stack([-numpy.sin(lon), numpy.cos(lon), numpy.zeros_like(lon)], axis=-1)
+    north = numpy.stack([-numpy.sin(lat) * numpy.cos(lon), -numpy.sin(lat) * numpy.sin(lon), numpy.cos(lat)], axis=-1)
+    up = numpy.stack([numpy.cos(lat) * numpy.cos(lon), numpy.cos(lat) * numpy.sin(lon), numpy.sin(lat)], axis=-1)
+
+    return station_position, numpy.stack([east, north, up], axis=-2)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# elevation and azimuth [deg] of ITRS positions seen from the stations (all arrays broadcast against each other)
+def Calc_Look_Angles(itrs_position, station_position, station_frame):
+    enu = numpy.einsum("...ij,...j->...i", station_frame, itrs_position - station_position)
+    elevation = numpy.rad2deg(numpy.arctan2(enu[..., 2], numpy.hypot(enu[..., 0], enu[..., 1])))
+    azimuth = numpy.rad2deg(numpy.mod(numpy.arctan2(enu[..., 0], enu[..., 1]), 2 * numpy.pi))
+
+    return elevation, azimuth
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ITRS positions [km] and velocities [km/s] of single satellites at individual points in time (one point in time per
+# entry of satellite)
+def Propagate_ITRS(list_satrec, satellite, times):
+    teme_position, teme_velocity = __FUNCTIONS.Propagate_TEME_Points(list_satrec, satellite=satellite, times=times)
+
+    # the velocity relative to the rotating earth: rotated TEME velocity minus earth rotation x position
+    itrs_position = __FUNCTIONS.TEME_to_ITRS_Native(list_times=times, teme_position=teme_position)
+    itrs_velocity = __FUNCTIONS.TEME_to_ITRS_Native(list_times=times, teme_position=teme_velocity)
+    itrs_velocity[:, 0] += EARTH_ROTATION * itrs_position[:, 1]
+    itrs_velocity[:, 1] -= EARTH_ROTATION * itrs_position[:, 0]
+
+    return itrs_position, itrs_velocity
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# elevation [deg] and elevation rate [deg/s] of single satellites over single stations at individual points in time
+def Calc_Elevation(list_satrec, station_position, station_frame, satellite, station, times):
+    itrs_position, itrs_velocity = Propagate_ITRS(list_satrec, satellite=satellite, times=times)
+    enu = numpy.einsum("nij,nj->ni", station_frame[station], itrs_position - station_position[station])
+    enu_rate = numpy.einsum("nij,nj->ni", station_frame[station], itrs_velocity)
+
+    horizontal = numpy.hypot(enu[:, 0], enu[:, 1])
+    horizontal_rate = (enu[:, 0] * enu_rate[:, 0] + enu[:, 1] * enu_rate[:, 1]) / horizontal
+    elevation = numpy.rad2deg(numpy.arctan2(enu[:, 2], horizontal))
+    elevation_rate = numpy.rad2deg((enu_rate[:, 2] * horizontal - enu[:, 2] * horizontal_rate) / (horizontal ** 2 + enu[:, 2] ** 2))
+
+    return elevation, elevation_rate
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# points in time, where the elevation crosses PASS_MIN_ELEVATION between time_a and time_b
+def Find_Crossings(list_satrec, station_position, station_frame, satellite, station, time_a, time_b):
+    def above_minimum(index, times):
+        elevation, elevation_rate = Calc_Elevation(list_satrec, station_position, station_frame, satellite[index], station[index], times)
+        return elevation - __SETTINGS.PASS_MIN_ELEVATION, elevation_rate * 86400
+
+    return __FUNCTIONS.Find_Roots(above_minimum, time_a, time_b, tolerance=__SETTINGS.PASS_TOLERANCE)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# points in time of the maximum elevation between time_a and time_b (root of the elevation rate) and the elevation [deg]
+def Find_Culminations(list_satrec, station_position, station_frame, satellite, station, time_a, time_b):
+    def elevation_rate(index, times):
+        return Calc_Elevation(list_satrec, station_position, station_frame, satellite[index], station[index], times)[1], None
+
+    time_max = __FUNCTIONS.Find_Roots(elevation_rate, time_a, time_b, tolerance=__SETTINGS.PASS_TOLERANCE)
+
+    return time_max, Calc_Elevation(list_satrec, station_position, station_frame, satellite, station, time_max)[0]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# largest central angle [rad] between a station and a satellite, at which the satellite can be above the minimum
+# elevation (spherical earth, at apogee, plus a margin for the ellipsoid), and the largest angular speed [rad/s] of the
+# satellite over the rotating earth (at perigee), one value per satellite
+def Calc_Visibility_Bounds(list_satrec, station_position):
+    mask = numpy.deg2rad(__SETTINGS.PASS_MIN_ELEVATION)
+    a = numpy.array([satrec.a * satrec.radiusearthkm for satrec in list_satrec])
+    e = numpy.array([satrec.ecco for satrec in list_satrec])
+
+    radius_station = numpy.min(numpy.linalg.norm(station_position, axis=-1))
+    max_angle = numpy.arccos(numpy.clip(radius_station * numpy.cos(mask) / (a * (1 + e)), -1, 1)) - mask + numpy.deg2rad(0.5)
+    max_rate = __FUNCTIONS.Calc_Angular_Rate_Bound(list_satrec)
+
+    return max_angle, max_rate
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# predict all passes of the satellites (catalog or single TLE) over the stations within the calculation window
+# returns a list of dicts (satellite, station, rise, culmination, set [jd], max_elevation, rise/set_azimuth [deg],
+# partial: the pass is cut by the start or the end of the window), sorted by the rise time
+# (cancel: see functions.Check_Cancel)
+@__PROFILING.Stage("pass prediction")
+def Predict_Passes(list_stations, cancel=None):
+    list_names, list_satrec = __FUNCTIONS.Get_Satellites()
+    satrec_array = __FUNCTIONS.SatrecArray(list_satrec)
+    station_position, station_frame = Calc_Station_Frames(list_stations)
+    station_direction = station_position / numpy.linalg.norm(station_position, axis=-1, keepdims=True)
+    max_angle, max_rate = Calc_Visibility_Bounds(list_satrec, station_position)
+    mask = __SETTINGS.PASS_MIN_ELEVATION
+    # hidden passes are only possible, where the satellite is this close to the station at two neighbouring samples
+    hidden_angle = (2 * max_angle + max_rate * __SETTINGS.PASS_SCAN_STEP * 86400)[:, numpy.newaxis, numpy.newaxis]
+
+    list_scan_times = numpy.append(numpy.arange(start=__INPUTS.TIME_START, stop=__INPUTS.TIME_END, step=__SETTINGS.PASS_SCAN_STEP), __INPUTS.TIME_END)
+    chunk_size = max(16, __SETTINGS.STREAM_CHUNK_SIZE // len(list_satrec))
+
+    # (satellite, station, time_a, time_b) of the rises, sets and hidden pass candidates found by the coarse scan
+    list_rises, list_sets, list_hidden = [], [], []
+    list_window_rises, list_window_sets = [], []
+
+    # 1. coarse scan, block by block; every block repeats the last two samples of the previous one (neighbours of maxima)
+    for start in range(0, len(list_scan_times) - 1, chunk_size):
+        __FUNCTIONS.Check_Cancel(cancel)
+        first = max(start - 2, 0)
+        times = list_scan_times[first:start + chunk_size + 1]
+        jd = numpy.floor(times)
+        error_codes, teme_position, teme_velocity = satrec_array.sgp4(jd, times - jd)
+        teme_position[error_codes != 0] = numpy.nan
+        itrs_position = __FUNCTIONS.TEME_to_ITRS_Native(list_times=times, teme_position=teme_position)
+        itrs_direction = itrs_position / numpy.linalg.norm(itrs_position, axis=-1, keepdims=True)
+
+        # elevation and central angle (satellites x stations x times), station by station as plain matrix products
+        elevation = numpy.stack([numpy.rad2deg(numpy.arcsin(((itrs_position - station_position[g]) @ station_frame[g, 2]) / numpy.linalg.norm(itrs_position - station_position[g], axis=-1))) for g in range(len(list_stations))], axis=1)
+        angle = numpy.arccos(numpy.clip(numpy.stack([itrs_direction @ station_direction[g] for g in range(len(list_stations))], axis=1), -1, 1))
+        above = elevation >= mask
+
+        if start == 0:
+            list_window_rises.append(numpy.argwhere(above[:, :, 0]))
+        if start + chunk_size + 1 >= len(list_scan_times):
+            list_window_sets.append(numpy.argwhere(above[:, :, -1]))
+
+        # sign changes between the samples k and k + 1 (the pairs before k0 were checked in the previous block)
+        k0 = start - first
+        for list_events, change in ((list_rises, ~above[..., k0:-1] & above[..., k0 + 1:]), (list_sets, above[..., k0:-1] & ~above[..., k0 + 1:])):
+            s, g, k = numpy.nonzero(change)
+            list_events.append((s, g, times[k0 + k], times[k0 + k + 1]))
+
+        # local maxima below the minimum elevation, that can hide a short pass between their neighbours
+        maximum = (elevation[..., 1:-1] >= elevation[..., :-2]) & (elevation[..., 1:-1] >= elevation[..., 2:]) & ~above[..., 1:-1]
+        close = numpy.minimum(angle[..., :-2] + angle[..., 1:-1], angle[..., 1:-1] + angle[..., 2:]) <= hidden_angle
+        s, g, k = numpy.nonzero(maximum & close)
+        new = k + 1 >= max(k0, 1)
+        list_hidden.append((s[new], g[new], times[k[new]], times[k[new] + 2]))
+
+    def concatenate(list_events):
+        return [numpy.concatenate([event[i] for event in list_events]) for i in range(4)]
+
+    rise_s, rise_g, rise_a, rise_b = concatenate(list_rises)
+    set_s, set_g, set_a, set_b = concatenate(list_sets)
+    hidden_s, hidden_g, hidden_a, hidden_b = concatenate(list_hidden)
+
+    # 2. hidden passes: the maximum between the neighbours of the sampled maximum is above the minimum elevation
+    __FUNCTIONS.Check_Cancel(cancel)
+    hidden_t, hidden_e = Find_Culminations(list_satrec, station_position, station_frame, hidden_s, hidden_g, hidden_a, hidden_b)
+    found = hidden_e >= mask
+    hidden_s, hidden_g, hidden_a, hidden_b, hidden_t = hidden_s[found], hidden_g[found], hidden_a[found], hidden_b[found], hidden_t[found]
+
+    # 3. refine all rises and sets
+    __FUNCTIONS.Check_Cancel(cancel)
+    rise_s, rise_g = numpy.concatenate([rise_s, hidden_s]), numpy.concatenate([rise_g, hidden_g])
+    rise_t = Find_Crossings(list_satrec, station_position, station_frame, rise_s, rise_g, numpy.concatenate([rise_a, hidden_a]), numpy.concatenate([rise_b, hidden_t]))
+    __FUNCTIONS.Check_Cancel(cancel)
+    set_s, set_g = numpy.concatenate([set_s, hidden_s]), numpy.concatenate([set_g, hidden_g])
+    set_t = Find_Crossings(list_satrec, station_position, station_frame, set_s, set_g, numpy.concatenate([set_a, hidden_t]), numpy.concatenate([set_b, hidden_b]))
+
+    # passes already in progress at the start or still in progress at the end of the window
+    window_rises = numpy.concatenate(list_window_rises)
+    window_sets = numpy.concatenate(list_window_sets)
+    rise_s, rise_g = numpy.concatenate([rise_s, window_rises[:, 0]]), numpy.concatenate([rise_g, window_rises[:, 1]])
+    rise_t = numpy.concatenate([rise_t, numpy.full(len(window_rises), list_scan_times[0])])
+    set_s, set_g = numpy.concatenate([set_s, window_sets[:, 0]]), numpy.concatenate([set_g, window_sets[:, 1]])
+    set_t = numpy.concatenate([set_t, numpy.full(len(window_sets), list_scan_times[-1])])
+
+    # rises and sets alternate for every satellite and station, so the n-th rise belongs to the n-th set
+    rise_order = numpy.lexsort((rise_t, rise_g, rise_s))
+    pass_s, pass_g, pass_rise = rise_s[rise_order], rise_g[rise_order], rise_t[rise_order]
+    pass_set = set_t[numpy.lexsort((set_t, set_g, set_s))]
+
+    # culmination and azimuths of all passes
+    __FUNCTIONS.Check_Cancel(cancel)
+    pass_culmination, pass_elevation = Find_Culminations(list_satrec, station_position, station_frame, pass_s, pass_g, pass_rise, pass_set)
+    rise_elevation, rise_azimuth = Calc_Look_Angles(Propagate_ITRS(list_satrec, pass_s, pass_rise)[0], station_position[pass_g], station_frame[pass_g])
+    set_elevation, set_azimuth = Calc_Look_Angles(Propagate_ITRS(list_satrec, pass_s, pass_set)[0], station_position[pass_g], station_frame[pass_g])
+    partial = (pass_rise <= list_scan_times[0]) | (pass_set >= list_scan_times[-1])
+
+    list_passes = []
+    for i in numpy.argsort(pass_rise, kind="stable"):
+        list_passes.append({
+            "satellite": list_names[pass_s[i]],
+            "satellite_index": int(pass_s[i]),
+            "station": list_stations[pass_g[i]][0],
+            "rise": float(pass_rise[i]),
+            "culmination": float(pass_culmination[i]),
+            "set": float(pass_set[i]),
+            "max_elevation": float(pass_elevation[i]),
+            "rise_azimuth": float(rise_azimuth[i]),
+            "set_azimuth": float(set_azimuth[i]),
+            "partial": bool(partial[i]),
+        })
+
+    return list_passes
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# draw the stations and the part of the ground track, that is visible from a station, of the first PASS_LIST_LENGTH passes
+# onto the map
+def Draw_Passes(ax_Map, list_passes, list_stations):
+    ax_Map.plot([station[2] for station in list_stations], [station[1] for station in list_stations], linestyle="", marker="^", color="blue", markersize=6)
+    for name, lat, lon, height in list_stations:
+        ax_Map.annotate(name, xy=(lon, lat), xytext=(3, 3), textcoords="offset points", fontsize=6, color="blue")
+    list_passes = list_passes[:__SETTINGS.PASS_LIST_LENGTH]
+    if len(list_passes) == 0:
+        return
+
+    list_names, list_satrec = __FUNCTIONS.Get_Satellites()
+    points = 32
+    satellite = numpy.repeat([one_pass["satellite_index"] for one_pass in list_passes], points)
+    fraction = numpy.tile(numpy.linspace(0, 1, points), len(list_passes))
+    rise = numpy.repeat([one_pass["rise"] for one_pass in list_passes], points)
+    duration = numpy.repeat([one_pass["set"] - one_pass["rise"] for one_pass in list_passes], points)
+    lat, lon, height = __FUNCTIONS.ITRS_to_GEODETIC_Native(Propagate_ITRS(list_satrec, satellite=satellite, times=rise + fraction * duration)[0])
+
+    # segments of all passes, without the segments jumping over the map edge
+    points_lonlat = numpy.stack([lon, lat], axis=-1).reshape(len(list_passes), points, 2)
+    segments = numpy.stack([points_lonlat[:, :-1], points_lonlat[:, 1:]], axis=2).reshape(-1, 2, 2)
+    segments = segments[numpy.abs(segments[:, 1, 0] - segments[:, 0, 0]) <= __SETTINGS.LONGITUDE_JUMP_CUTOFF]
+    ax_Map.add_collection(LineCollection(segments, colors="blue", linewidths=3, alpha=0.5))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# list of passes as text (at most PASS_LIST_LENGTH passes)
+def Format_Passes(list_passes):
+    lines = [f"{'satellite':<16} {'station':<12} {'rise (UTC)':<19}  {'culmination':<19}  {'set':<19}  {'max el':>6}  {'az rise/set':>11}"]
+    for one_pass in list_passes[:__SETTINGS.PASS_LIST_LENGTH]:
+        lines.append(f"{one_pass['satellite'][:16]:<16} {one_pass['station'][:12]:<12} {__FUNCTIONS.JD_to_ISO(one_pass['rise'])}  {__FUNCTIONS.JD_to_ISO(one_pass['culmination'])}  {__FUNCTIONS.JD_to_ISO(one_pass['set'])}  {one_pass['max_elevation']:6.1f}  {one_pass['rise_azimuth']:5.0f}/{one_pass['set_azimuth']:.0f}" + (" (partial)" if one_pass["partial"] else ""))
+    if len(list_passes) > __SETTINGS.PASS_LIST_LENGTH:
+        lines.append(f"... {len(list_passes) - __SETTINGS.PASS_LIST_LENGTH} more passes")
+
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+# PROFILING
+# optional instrumentation of the pipeline stages: wall time and number of calls per stage, summed up per run
+# (one plot, save or clear), optionally a cProfile dump or a json trace (chrome://tracing format) per run
+# when PROFILING_ENABLED is off, Stage() returns the undecorated functions and Measure() an empty context, so it costs nothing
+
+# library imports
+import os
+import time
+import json
+import cProfile
+import threading
+import functools
+import contextlib
+
+# import of own functions and variables
+import settings as __SETTINGS
+
+# calls and wall time [s] per stage of the current run, trace events and profiler of the current run
+STAGES: dict = {}
+TRACE: list = []
+PROFILER = None
+RUN_START = time.perf_counter()
+LOCK = threading.Lock()     # stages are recorded from the gui thread and the worker thread
+
+NULL_CONTEXT = contextlib.nullcontext()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# decorator: record every call of the function as the given stage (wall time includes nested stages)
+def Stage(name):
+    def decorator(func):
+        if not __SETTINGS.PROFILING_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                Record(name, start, time.perf_counter())
+        return wrapper
+    return decorator
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# context manager: record the enclosed block as the given stage
+def Measure(name):
+    if not __SETTINGS.PROFILING_ENABLED:
+        return NULL_CONTEXT
+
+    return Measure_Block(name)
+
+
+@contextlib.contextmanager
+def Measure_Block(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        Record(name, start, time.perf_counter())
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# add one call of a stage to the current run
+def Record(name, start, stop):
+    with LOCK:
+        entry = STAGES.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += stop - start
+        if __SETTINGS.PROFILING_OUTPUT == "json":
+            TRACE.append({"name": name, "ph": "X", "ts": (start - RUN_START) * 1e6, "dur": (stop - start) * 1e6, "pid": os.getpid(), "tid": threading.get_ident()})
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# start a new run: forget the stages of the previous run and create a new profiler (if cProfile output is selected)
+def Start_Run():
+    global PROFILER, RUN_START
+
+    if not __SETTINGS.PROFILING_ENABLED:
+        return
+
+    with LOCK:
+        STAGES.clear()
+        TRACE.clear()
+        RUN_START = time.perf_counter()
+    PROFILER = cProfile.Profile() if __SETTINGS.PROFILING_OUTPUT == "cprofile" else None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# context manager: run the enclosed block under the profiler of the current run
+# (cProfile only sees the thread it is enabled in, so the gui thread and the worker thread enable it one after another)
+def Profile():
+    if PROFILER is None:
+        return NULL_CONTEXT
+
+    return PROFILER
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# summary of the current run for the setup info, sorted by wall time ("" if profiling is off)
+def Summary():
+    if not __SETTINGS.PROFILING_ENABLED:
+        return ""
+
+    with LOCK:
+        list_stages = sorted(STAGES.items(), key=lambda item: item[1][1], reverse=True)
+    summary_string = "\n\nPROFILING (wall time, incl. nested stages):"
+    for name, (calls, seconds) in list_stages:
+        summary_string += f"\n{name}: {seconds:.3f} s ({calls}x)"
+
+    return summary_string
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# write the cProfile dump (.prof) or the json trace of the current run to PROFILING_DIR, returns the path (or None)
+def Write_Run(name):
+    if not __SETTINGS.PROFILING_ENABLED or __SETTINGS.PROFILING_OUTPUT is None:
+        return None
+
+    os.makedirs(__SETTINGS.PROFILING_DIR, exist_ok=True)
+    path = os.path.join(__SETTINGS.PROFILING_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    if __SETTINGS.PROFILING_OUTPUT == "cprofile":
+        path += ".prof"
+        PROFILER.dump_stats(path)
+    else:
+        path += ".json"
+        with LOCK:
+            trace = {"traceEvents": list(TRACE), "stages": {stage: {"calls": calls, "seconds": seconds} for stage, (calls, seconds) in STAGES.items()}}
+        with open(path, "w") as trace_file:
+            json.dump(trace, trace_file)
+
+    return path
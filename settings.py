@@ -8,5 +8,42 @@ PLOT_DPI = 600                                          # render and export qual
 PLOT_ONSCREEN_WIDTH = 10                                # plot size in gui (width)
 PLOT_ONSCREEN_HEIGHT = 10                               # plot size in gui (height)
 PLOT_ARROW_SIZE = 10                                    # arrow size in plot
+PLOT_TOLERANCE_PX = 0.5                                 # tracks and height plot are reduced to the points needed to draw them within this many pixels at PLOT_DPI, before the artists are created
+PLOT_COLOR_STEPS = 64                                   # number of steps of the speed colors (from red to yellow), stretches of the same color are drawn as one piece
+PLOT_DECIMATION = True                                  # level of detail: tracks and height plot only draw the points visible per pixel (decimated again for the export at PLOT_DPI)
 
-HEIGHT_PLOT_TIME_STEPS = 5                             # number of label increments for height plot
\ No newline at end of file
+HEIGHT_PLOT_TIME_STEPS = 5                             # number of label increments for height plot
+
+TRANSFORM_BACKEND = "astropy"                           # TEME -> geodetic transform: "astropy", "numpy" (fast, native) or "compare" (astropy, reports the deviation of numpy)
+UT1_UTC = 0                                             # UT1 - UTC [s] used by the numpy transform backend (|UT1 - UTC| < 0.9s)
+POLAR_MOTION_X = 0                                      # polar motion x [arcsec] used by the numpy transform backend
+POLAR_MOTION_Y = 0                                      # polar motion y [arcsec] used by the numpy transform backend
+
+ADAPTIVE_TOLERANCE_PX = 0.5                             # adaptive sampling: maximum deviation of the drawn track from the exact one, in pixels at PLOT_DPI
+ADAPTIVE_MAX_STEP = 1 / 144                             # adaptive sampling: largest time step (coarse start grid), in jd-format (10 min)
+
+STREAM_CHUNK_SIZE = 100000                              # longer calculation windows are propagated and drawn in blocks of this many samples (satellites x points in time)
+
+CACHE_ENABLED = True                                    # keep propagated satellite data on disk, re-plots of the same TLE and time increment are (nearly) instant
+CACHE_DIR = "cache"                                     # directory of the on-disk cache
+CACHE_MAX_BYTES = 500 * 1024 * 1024                     # maximum size of the on-disk cache, the least recently used entries are deleted first
+
+PROFILING_ENABLED = False                               # record wall time and calls of every pipeline stage, the summary is shown in the setup info
+PROFILING_OUTPUT = None                                 # additionally write every run to PROFILING_DIR: None, "cprofile" (.prof, e.g. for snakeviz) or "json" (trace for chrome://tracing)
+PROFILING_DIR = "profiling"                             # directory of the profiling output
+
+PASS_MIN_ELEVATION = 10                                 # ground station passes: minimum elevation [deg] above the horizon
+PASS_SCAN_STEP = 1 / 288                                # ground station passes: time step of the coarse scan, in jd-format (5 min, the elevation must have a single maximum within 2 steps)
+PASS_TOLERANCE = 0.1 / 86400                            # ground station passes: accuracy of rise, culmination and set times, in jd-format (0.1 s)
+PASS_LIST_LENGTH = 500                                  # ground station passes: maximum number of passes listed in the gui and drawn onto the map
+
+CONJUNCTION_DISTANCE = 10                               # conjunction screening: report close approaches below this miss distance [km]
+CONJUNCTION_SCAN_STEP = 1 / 1440                        # conjunction screening: time step of the coarse screening, in jd-format (1 min)
+CONJUNCTION_TOLERANCE = 0.01 / 86400                    # conjunction screening: accuracy of the time of closest approach, in jd-format (10 ms)
+CONJUNCTION_LIST_LENGTH = 500                           # conjunction screening: maximum number of close approaches listed in the gui and marked on the map
+
+COVERAGE_RESOLUTION = 1                                 # coverage map: size of the lat/lon cells [deg]
+COVERAGE_SWATH = 0                                      # coverage map: swath width of the sensor [km] (0: only the cells the ground track crosses)
+COVERAGE_SCAN_DENSITY = 4                               # coverage map: points of the scan per cap radius the ground track moves (independent of the time increment)
+COVERAGE_COLORMAP = "inferno"                           # coverage map: matplotlib colormap of the heatmap
+COVERAGE_ALPHA = 0.6                                    # coverage map: opacity of the heatmap over the map image